@@ -0,0 +1,90 @@
+"""
+Measure how long it takes to import the paragraph synthesis modules.
+
+Each import runs in a fresh interpreter, so nothing is cached between runs.
+Run from the ICE root, e.g.
+
+    python ice/contrib/ought_shared/benchmarks/import_time.py --baseline import_time.json
+
+With --baseline, exits non-zero if any module got slower than the stored
+median by more than --tolerance. With --save, writes the medians as the new
+baseline.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from pathlib import Path
+from statistics import median
+
+MODULES = [
+    "ice.contrib.ought_shared.paragraph_synthesis.synthesize",
+    "ice.contrib.ought_shared.paragraph_synthesis.synthesize_compositional",
+    "ice.contrib.ought_shared.paragraph_synthesis.eval_synthesize",
+]
+
+MEASURE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+registry = sys.modules.get(
+    "ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry"
+)
+print(elapsed, registry is not None and registry._tokenizer is not None)
+"""
+
+
+def measure_import_time(module: str, repeats: int = 5) -> float:
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(module=module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        elapsed, tokenizer_loaded = float(output[-2]), output[-1] == "True"
+        if tokenizer_loaded:
+            raise AssertionError(f"Importing {module} loaded the tokenizer")
+        timings.append(elapsed)
+    return median(timings)
+
+
+def compare_to_baseline(
+    results: dict[str, float], baseline: dict[str, float], tolerance: float
+) -> list[str]:
+    return [
+        f"{module}: {seconds:.3f}s vs baseline {baseline[module]:.3f}s"
+        for module, seconds in results.items()
+        if module in baseline and seconds > baseline[module] * (1 + tolerance)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save", action="store_true")
+    args = parser.parse_args()
+
+    results = {module: measure_import_time(module, args.repeats) for module in MODULES}
+    for module, seconds in results.items():
+        print(f"{seconds:8.3f}s  {module}")
+
+    if args.baseline and args.save:
+        args.baseline.write_text(json.dumps(results, indent=2))
+    elif args.baseline and args.baseline.exists():
+        regressions = compare_to_baseline(
+            results, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"Import time regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Offline benchmarks for the CPU-side hot paths of the contrib recipes and
+data pipelines. LM calls go to a SimulatedAgent with zero latency and the completion
+and sub-answer caches live in memory, so runs only measure local work.
+Fixtures are the checked-in CSV/YAML files, repeated --scale times.
+
+Run from the ICE root:
+
+    python ice/contrib/ought_shared/benchmarks/suite.py --scale 20 --output bench.json
+    python ice/contrib/ought_shared/benchmarks/suite.py --baseline bench.json
+
+With --baseline, exits non-zero if any case got slower than the baseline by
+more than --tolerance. --cases selects a subset, --import-time adds the
+import_time.py measurements.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+
+from collections.abc import Awaitable
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from statistics import median
+from typing import Any
+
+import anyio
+import pandas as pd
+
+from ice.contrib.ought_shared.benchmarks.import_time import MODULES
+from ice.contrib.ought_shared.benchmarks.import_time import compare_to_baseline
+from ice.contrib.ought_shared.benchmarks.import_time import measure_import_time
+from ice.contrib.ought_shared.benchmarks.yaml_modes import V2_FLOWS
+from ice.contrib.ought_shared.benchmarks.yaml_modes import benchmark_yaml_modes
+from ice.contrib.ought_shared.consort_flow.add_adherence import merge_adherence
+from ice.contrib.ought_shared.consort_flow.parse_experiments_arms_gs.experiments_gs import (
+    convert_experiments_gs,
+)
+from ice.contrib.ought_shared.consort_flow.validate_schema import validate_flows
+from ice.contrib.ought_shared.eval.agent_wrappers import isolated_caches
+from ice.contrib.ought_shared.eval.agent_wrappers import use_agent
+from ice.contrib.ought_shared.eval.eval_vs_gs import run_recipes_over_gs
+from ice.contrib.ought_shared.eval.run_over_csv import run_over_csv
+from ice.contrib.ought_shared.eval.simulated_agent import LatencyProfile
+from ice.contrib.ought_shared.eval.simulated_agent import SimulatedAgent
+from ice.contrib.ought_shared.paragraph_synthesis.gold_standard import (
+    parse_gold_standard,
+)
+from ice.contrib.ought_shared.paragraph_synthesis.synthesize import synthesize
+from ice.contrib.ought_shared.paragraph_synthesis.synthesize_chain_of_thought import (
+    synthesize_chain_of_thought,
+)
+from ice.contrib.ought_shared.paragraph_synthesis.synthesize_compositional import (
+    synthesize_compositional,
+)
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    use_tokenizer,
+)
+from ice.contrib.ought_shared.qa.qa_column_config import RegexSearchStrategy
+from ice.contrib.ought_shared.qa.qa_column_config import qa_column_configs
+
+ROOT = Path(__file__).parent.parent
+GS_CSV = ROOT / "paragraph_synthesis" / "paragraph_synthesis_gs.csv"
+EXPERIMENTS_YAML = (
+    ROOT / "consort_flow" / "parse_experiments_arms_gs" / "experiments.yaml"
+)
+
+
+@dataclass
+class CaseResult:
+    seconds: float
+    items: int
+    details: dict[str, Any] = field(default_factory=dict)
+
+
+class Stopwatch:
+    def __enter__(self) -> "Stopwatch":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.seconds = time.perf_counter() - self.start
+
+
+@dataclass
+class Fixtures:
+    scale: int
+    workdir: Path
+
+    def synthesis_gs(self) -> pd.DataFrame:
+        gs_df = parse_gold_standard(GS_CSV.read_bytes())
+        copies = []
+        for i in range(self.scale):
+            copy = gs_df.copy()
+            copy["question"] = copy["question"] + f" ({i})"
+            copy["document_id"] = copy["question"]
+            copies.append(copy)
+        return pd.concat(copies, ignore_index=True)
+
+    def synthesis_rows(self) -> list[dict]:
+        gs_df = self.synthesis_gs()
+        return [
+            {"question": question, "abstracts": abstracts}
+            for question, abstracts in zip(gs_df["question"], gs_df["abstracts"])
+        ]
+
+    def v2_flows(self) -> pd.DataFrame:
+        flows_df = pd.read_csv(V2_FLOWS)
+        copies = []
+        for i in range(self.scale):
+            copy = flows_df.copy()
+            copy["document_id"] = copy["document_id"] + f"-{i}"
+            copies.append(copy)
+        return pd.concat(copies, ignore_index=True)
+
+    def experiments_yaml(self) -> Path:
+        text = EXPERIMENTS_YAML.read_text()
+        path = self.workdir / "experiments.yaml"
+        with open(path, "w") as f:
+            for i in range(self.scale):
+                f.write(re.sub(r"(?m)^(.*)\.pdf$", rf"\1-{i}.pdf", text) + "\n")
+        return path
+
+    def paragraphs(self) -> list[str]:
+        gs_df = self.synthesis_gs()
+        return [abstract.text for abstracts in gs_df["abstracts"] for abstract in abstracts]
+
+
+async def run_recipe_rows(recipe_to_run, rows: list[dict]) -> CaseResult:
+    with Stopwatch() as watch:
+        for row in rows:
+            await recipe_to_run(**row)
+    return CaseResult(watch.seconds, len(rows))
+
+
+async def bench_synthesize(fixtures: Fixtures) -> CaseResult:
+    return await run_recipe_rows(synthesize, fixtures.synthesis_rows())
+
+
+async def bench_synthesize_chain_of_thought(fixtures: Fixtures) -> CaseResult:
+    return await run_recipe_rows(synthesize_chain_of_thought, fixtures.synthesis_rows())
+
+
+async def bench_synthesize_compositional(fixtures: Fixtures) -> CaseResult:
+    return await run_recipe_rows(synthesize_compositional, fixtures.synthesis_rows())
+
+
+async def bench_run_over_gs(fixtures: Fixtures) -> CaseResult:
+    gs_df = fixtures.synthesis_gs()
+    with Stopwatch() as watch:
+        await run_recipes_over_gs([synthesize], gs_df, ["validation"])
+    return CaseResult(watch.seconds, int((gs_df["split"] == "validation").sum()))
+
+
+@contextmanager
+def working_directory(path: Path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+async def bench_run_over_csv(fixtures: Fixtures) -> CaseResult:
+    df = pd.DataFrame(fixtures.synthesis_rows())
+    # run_over_csv writes its checkpoint and output under ./data
+    with working_directory(fixtures.workdir), Stopwatch() as watch:
+        await run_over_csv(df, synthesize, overwrite=True)
+    return CaseResult(watch.seconds, len(df))
+
+
+async def bench_validate_schema(fixtures: Fixtures) -> CaseResult:
+    flows_df = fixtures.v2_flows()
+    with Stopwatch() as watch:
+        report = validate_flows(flows_df)
+    return CaseResult(watch.seconds, len(flows_df), {"errors": len(report.errors)})
+
+
+async def bench_add_adherence(fixtures: Fixtures) -> CaseResult:
+    flows_df = fixtures.v2_flows()
+    flows = validate_flows(flows_df).flows
+    v1_df = flows_df.assign(flow_answer=[flow.copy(deep=True) for flow in flows])
+    adherence_df = flows_df.assign(flow_answer=flows)
+    with Stopwatch() as watch:
+        _, report = merge_adherence(v1_df, adherence_df)
+    return CaseResult(
+        watch.seconds, len(v1_df), {"added_received": len(report.added_received)}
+    )
+
+
+async def bench_experiments_parser(fixtures: Fixtures) -> CaseResult:
+    path = fixtures.experiments_yaml()
+    with Stopwatch() as watch:
+        papers = convert_experiments_gs(path, fixtures.workdir / "experiments.csv")
+    return CaseResult(watch.seconds, papers)
+
+
+async def bench_regex_columns(fixtures: Fixtures) -> CaseResult:
+    """
+    Each RegexSearchStrategy column searched over every paragraph on its own,
+    as the QA runner does: first matching pattern per (column, paragraph).
+    """
+    paragraphs = fixtures.paragraphs()
+    columns = {
+        name: config.search_strategy.patterns
+        for name, config in qa_column_configs.items()
+        if isinstance(config.search_strategy, RegexSearchStrategy)
+    }
+    details: dict[str, Any] = {"matches": 0}
+    with Stopwatch() as watch:
+        for name, patterns in columns.items():
+            with Stopwatch() as column_watch:
+                for text in paragraphs:
+                    if any(pattern.search(text) for pattern in patterns):
+                        details["matches"] += 1
+            details[f"{name}_s"] = column_watch.seconds
+    return CaseResult(watch.seconds, len(paragraphs), details)
+
+
+async def bench_yaml_modes(fixtures: Fixtures) -> CaseResult:
+    answers = pd.read_csv(V2_FLOWS)["answer"].dropna().tolist() * fixtures.scale
+    details = benchmark_yaml_modes(answers)
+    return CaseResult(details["fast"]["load_s"], len(answers), details)
+
+
+CASES: dict[str, Callable[[Fixtures], Awaitable[CaseResult]]] = {
+    "synthesize": bench_synthesize,
+    "synthesize_chain_of_thought": bench_synthesize_chain_of_thought,
+    "synthesize_compositional": bench_synthesize_compositional,
+    "run_over_gs": bench_run_over_gs,
+    "run_over_csv": bench_run_over_csv,
+    "validate_schema": bench_validate_schema,
+    "add_adherence": bench_add_adherence,
+    "experiments_parser": bench_experiments_parser,
+    "regex_columns": bench_regex_columns,
+    "yaml_modes": bench_yaml_modes,
+}
+
+
+def instant_agent() -> SimulatedAgent:
+    """
+    Deterministic answers with no latency and no failures.
+    """
+    return SimulatedAgent(
+        latency=LatencyProfile("constant", median=0.0),
+        completion_tokens=40,
+        time_scale=0.0,
+        model="fake",
+    )
+
+
+@contextmanager
+def offline_environment(tokenizer: str):
+    """
+    An instant SimulatedAgent and in-memory caches that are never read from.
+    """
+    use_tokenizer(tokenizer)
+    with isolated_caches(), use_agent(instant_agent()):
+        yield
+
+
+async def run_suite(
+    cases: list[str], scale: int, repeats: int, tokenizer: str = "approximate"
+) -> dict[str, dict[str, Any]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        with offline_environment(tokenizer):
+            fixtures = Fixtures(scale=scale, workdir=Path(tmp))
+            for name in cases:
+                runs = [await CASES[name](fixtures) for _ in range(repeats)]
+                seconds = median(run.seconds for run in runs)
+                results[name] = {
+                    "seconds": seconds,
+                    "items": runs[0].items,
+                    "items_per_s": runs[0].items / seconds if seconds else None,
+                    "details": runs[-1].details,
+                }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument(
+        "--tokenizer",
+        default="approximate",
+        help="tokenizer_registry entry; gpt2 needs the model files",
+    )
+    parser.add_argument("--import-time", action="store_true")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = anyio.run(run_suite, args.cases, args.scale, args.repeats, args.tokenizer)
+    if args.import_time:
+        for module in MODULES:
+            seconds = measure_import_time(module, args.repeats)
+            results[f"import:{module}"] = {"seconds": seconds, "items": 1}
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "repeats": args.repeats,
+            "tokenizer": args.tokenizer,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    for name, result in results.items():
+        print(f"{result['seconds']:9.4f}s  {result['items']:7d} items  {name}")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare_to_baseline(
+            {name: result["seconds"] for name, result in results.items()},
+            {name: result["seconds"] for name, result in baseline.items()},
+            args.tolerance,
+        )
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Compare MyYAML's round-trip (pure Python) and fast (libyaml) loading of the
+ConsortFlow answers in consort_flow/v2_flows.csv.
+
+Run from the ICE root:
+
+    python ice/contrib/ought_shared/benchmarks/yaml_modes.py --scale 50
+
+Reports load time per mode and whether both modes load the same data. Both
+modes dump with the round-trip emitter.
+"""
+import argparse
+import json
+import time
+
+from pathlib import Path
+
+import pandas as pd
+
+from ice.contrib.ought_shared.utils import MyYAML
+
+V2_FLOWS = Path(__file__).parent.parent / "consort_flow" / "v2_flows.csv"
+
+
+def plain(data):
+    return json.loads(json.dumps(data))
+
+
+def timed(fn, items) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = [fn(item) for item in items]
+    return time.perf_counter() - start, results
+
+
+def benchmark_yaml_modes(answers: list[str]) -> dict:
+    round_trip = MyYAML()
+    fast = MyYAML(fast=True)
+
+    rt_load_seconds, rt_loaded = timed(round_trip.load, answers)
+    fast_load_seconds, fast_loaded = timed(fast.load, answers)
+
+    return {
+        "answers": len(answers),
+        "round_trip": {"load_s": rt_load_seconds},
+        "fast": {"load_s": fast_load_seconds},
+        "load_speedup": rt_load_seconds / fast_load_seconds,
+        "loaded_data_identical": all(
+            plain(a) == plain(b) for a, b in zip(rt_loaded, fast_loaded)
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", type=Path, default=V2_FLOWS)
+    parser.add_argument(
+        "--scale", type=int, default=10, help="repeat the answers this many times"
+    )
+    args = parser.parse_args()
+
+    answers = pd.read_csv(args.csv)["answer"].dropna().tolist() * args.scale
+    print(json.dumps(benchmark_yaml_modes(answers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
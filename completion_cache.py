@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from pathlib import Path
+from typing import Any
+from typing import Optional
+
+import anyio
+
+from ice.agents.base import Agent
+from ice.agents.base import Stop
+from ice.contrib.ought_shared.singleflight import SingleFlight
+from ice.recipe import recipe
+from ice.settings import CACHE_DIR
+
+MISSING = object()
+
+
+class DiskCache:
+    """
+    Persistent key -> value store in a SQLite file. Values are pickled. Once
+    the stored values exceed `max_bytes`, the least recently used entries are
+    evicted. Use get_async/set_async from async code, so the queries run in a
+    worker thread instead of blocking the event loop.
+    """
+
+    # Hits update last_used in batches of this many, not one commit per hit
+    TOUCH_BATCH = 256
+
+    def __init__(self, path: Path, max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_used REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= self.TOUCH_BATCH:
+                self._flush_touched()
+                self.conn.commit()
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        blob = pickle.dumps(value)
+        with self._lock:
+            self._touched.pop(key, None)
+            self._flush_touched()
+            self.conn.execute(
+                "REPLACE INTO entries (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self._evict()
+            self.conn.commit()
+
+    async def get_async(self, key: str, default: Any = MISSING) -> Any:
+        return await anyio.to_thread.run_sync(self.get, key, default)
+
+    async def set_async(self, key: str, value: Any) -> None:
+        await anyio.to_thread.run_sync(self.set, key, value)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self.conn.commit()
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _size(self) -> int:
+        # From the file rather than tracked here, since other processes write too
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def _evict(self) -> None:
+        excess = self._size() - self.max_bytes
+        while excess > 0:
+            oldest = self.conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_used LIMIT 64"
+            ).fetchall()
+            if not oldest:
+                break
+            for key, size in oldest:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                excess -= size
+                if excess <= 0:
+                    break
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            size = self._size()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self),
+            "bytes": size,
+        }
+
+
+def completion_key(
+    prompt: str,
+    max_tokens: int,
+    stop: Stop,
+    logit_bias: Optional[dict[str, float]],
+    model: str,
+) -> str:
+    payload = json.dumps(
+        [prompt, max_tokens, stop, logit_bias, model], sort_keys=True
+    ).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def agent_model(agent: Agent) -> str:
+    return getattr(agent, "model", None) or type(agent).__name__
+
+
+_completion_cache: Optional[DiskCache] = None
+
+
+def completion_cache() -> DiskCache:
+    global _completion_cache
+    if _completion_cache is None:
+        _completion_cache = DiskCache(CACHE_DIR / "ought_shared_completions.sqlite")
+    return _completion_cache
+
+
+# Shared by all cached_complete calls, so identical requests that miss the
+# cache at the same time are only sent once
+completion_flight = SingleFlight()
+
+
+def cache_bypassed() -> bool:
+    return os.environ.get("ICE_COMPLETION_CACHE", "1").lower() in ("0", "false", "off")
+
+
+async def cached_complete(
+    *,
+    prompt: str,
+    max_tokens: int,
+    stop: Stop = None,
+    logit_bias: Optional[dict[str, float]] = None,
+    agent: Optional[Agent] = None,
+    cache: Optional[DiskCache] = None,
+    bypass: bool = False,
+) -> str:
+    """
+    recipe.agent().complete(...), but identical (prompt, max_tokens, stop,
+    logit_bias, model) requests are answered from an on-disk cache, and
+    identical requests that miss it at the same time share one call. Pass
+    bypass=True or set ICE_COMPLETION_CACHE=0 to always call the model (the
+    fresh completion still replaces the cached one).
+    """
+    if agent is None:
+        agent = recipe.agent()
+    if cache is None:
+        cache = completion_cache()
+    key = completion_key(prompt, max_tokens, stop, logit_bias, agent_model(agent))
+
+    kwargs = {} if logit_bias is None else {"logit_bias": logit_bias}
+
+    async def complete_and_cache() -> str:
+        completion = await agent.complete(
+            prompt=prompt, max_tokens=max_tokens, stop=stop, **kwargs
+        )
+        await cache.set_async(key, completion)
+        return completion
+
+    if bypass or cache_bypassed():
+        return await complete_and_cache()
+
+    completion = await cache.get_async(key)
+    if completion is not MISSING:
+        return completion
+    return await completion_flight.do((cache.path, key), complete_and_cache)
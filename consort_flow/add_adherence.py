@@ -1,45 +1,96 @@
 # goals: 1. merge in adherence (allocation diverged)
 import pandas as pd
-from ice.recipes.consort_flow.types import ConsortFlow
+from dataclasses import dataclass, field
+from pprint import pprint
+from ice.recipes.consort_flow.types import Arm, ConsortFlow
 from ice.contrib.ought_shared.utils import MyYAML
 from ice.contrib.ought_shared.consort_flow.validate_schema import validate_schema
 
 yaml = MyYAML()
 yaml.indent(mapping=2, sequence=4, offset=2)
 
-def sub_in_new_adherence(v1_row: pd.Series, adherence_df: pd.DataFrame) -> ConsortFlow:
-    v1_flow: ConsortFlow = v1_row["flow_answer"]
-    adherence_flow: ConsortFlow = adherence_df[adherence_df["document_id"] == v1_row["document_id"]].iloc[0]["flow_answer"]
+@dataclass
+class AdherenceMergeReport:
+    missing_documents: list[str] = field(default_factory=list)
+    # (document_id, experiment name)
+    missing_experiments: list[tuple[str, str]] = field(default_factory=list)
+    # (document_id, experiment name, arm name)
+    missing_arms: list[tuple[str, str, str]] = field(default_factory=list)
+    added_received: list[tuple[str, str, str]] = field(default_factory=list)
+    # Repeated names in an adherence flow; only the first is used
+    duplicate_experiments: list[tuple[str, str]] = field(default_factory=list)
+    duplicate_arms: list[tuple[str, str, str]] = field(default_factory=list)
+
+def index_arms(document_id: str, flow: ConsortFlow, report: AdherenceMergeReport) -> dict[tuple[str, str], Arm]:
+    """
+    (experiment name, arm name) -> arm. As when arms were looked up by
+    scanning the flow, the first experiment and arm with a name win.
+    """
+    arms: dict[tuple[str, str], Arm] = {}
+    experiments = set()
+    for experiment in flow.experiments:
+        if experiment.name in experiments:
+            report.duplicate_experiments.append((document_id, experiment.name))
+            continue
+        experiments.add(experiment.name)
+        for arm in experiment.arms:
+            if (experiment.name, arm.name) in arms:
+                report.duplicate_arms.append((document_id, experiment.name, arm.name))
+                continue
+            arms[experiment.name, arm.name] = arm
+    return arms
+
+def sub_in_new_adherence(document_id: str, v1_flow: ConsortFlow, adherence_flow: ConsortFlow, report: AdherenceMergeReport) -> ConsortFlow:
+    adherence_arms = index_arms(document_id, adherence_flow, report)
+    adherence_experiments = {experiment.name for experiment in adherence_flow.experiments}
 
     for v1_experiment in v1_flow.experiments:
+        if v1_experiment.name not in adherence_experiments:
+            report.missing_experiments.append((document_id, v1_experiment.name))
+            continue
+
         for v1_arm in v1_experiment.arms:
-            try:
-                v2_experiment = [v2_experiment for v2_experiment in adherence_flow.experiments if v2_experiment.name == v1_experiment.name][0]
-            except IndexError:
-                print(f"did not find experiment {v1_experiment.name} for document {v1_row['document_id']}")
-            
-            try:
-                v2_arm = [v2_arm for v2_arm in v2_experiment.arms if v2_arm.name == v1_arm.name][0]
-
-                v1_arm.received = v2_arm.received
-
-                if v2_arm.received:
-                    print(f"added received for arm {v1_arm.name} in experiment {v1_experiment.name} for document {v1_row['document_id']}")
-            except IndexError:
-                print(f"did not find arm {v1_arm.name} for document {v1_row['document_id']}")
-    
+            v2_arm = adherence_arms.get((v1_experiment.name, v1_arm.name))
+            if v2_arm is None:
+                report.missing_arms.append((document_id, v1_experiment.name, v1_arm.name))
+                continue
+
+            v1_arm.received = v2_arm.received
+            if v2_arm.received:
+                report.added_received.append((document_id, v1_experiment.name, v1_arm.name))
+
     return v1_flow
 
+def merge_adherence(v1_df: pd.DataFrame, adherence_df: pd.DataFrame) -> tuple[list[ConsortFlow], AdherenceMergeReport]:
+    """
+    Copy `received` from each document's adherence flow into its v1 flow
+    (in place), matching experiments and arms by name. Documents, experiments
+    and arms without a match are left unchanged and listed in the report.
+    """
+    adherence_flows: dict[str, ConsortFlow] = {}
+    for document_id, flow in zip(adherence_df["document_id"], adherence_df["flow_answer"]):
+        adherence_flows.setdefault(document_id, flow)
+
+    report = AdherenceMergeReport()
+    merged_flows = []
+    for document_id, v1_flow in zip(v1_df["document_id"], v1_df["flow_answer"]):
+        adherence_flow = adherence_flows.get(document_id)
+        if adherence_flow is None:
+            report.missing_documents.append(document_id)
+            merged_flows.append(v1_flow)
+            continue
+        merged_flows.append(sub_in_new_adherence(document_id, v1_flow, adherence_flow, report))
+    return merged_flows, report
+
 if __name__ == "__main__":
     gs_df = pd.read_csv("gold_standards/gold_standards.csv")
     gs_df = gs_df[gs_df["question_short_name"].isin(["consort_flow", "consort_flow_with_adherence"])]
-    validate_schema(gs_df)
-
-    gs_df["flow_answer"] = gs_df["answer"].apply(lambda x: ConsortFlow.parse_obj(yaml.load(x)))
+    gs_df["flow_answer"] = validate_schema(gs_df)
 
     v2_df = gs_df[gs_df["question_short_name"] == "consort_flow"].copy()
     adherence_df = gs_df[gs_df["question_short_name"] == "consort_flow_with_adherence"].copy()
-    v2_df["consort_flow_v2"] = v2_df.apply(lambda row: sub_in_new_adherence(row, adherence_df), axis=1)
+    v2_df["consort_flow_v2"], report = merge_adherence(v2_df, adherence_df)
+    pprint(report)
 
     v2_df["answer"] = v2_df["consort_flow_v2"].apply(lambda x: yaml.dump(x.dict()))
 
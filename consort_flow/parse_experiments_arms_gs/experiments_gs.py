@@ -0,0 +1,208 @@
+"""
+Streaming parser for the experiments.yaml gold standard format: a paper file
+name (*.pdf) on its own line, followed by that paper's YAML with
+"experiments" and "supporting quotes" keys.
+"""
+import csv
+import json
+import os
+import tempfile
+
+from collections import deque
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+from ice.contrib.ought_shared.utils import MyYAML
+from ice.recipes.consort_flow.types import ConsortFlow
+
+QUESTION_SHORT_NAME = "consort_flow_v2"
+
+yaml = MyYAML(fast=True)
+
+PaperBlock = tuple[str, str]
+
+
+def paper_block_lines(lines: Iterable[str]) -> Iterator[tuple[str, list[str]]]:
+    paper_name = ""
+    block_lines: list[str] = []
+    for line in lines:
+        if line.strip() == "":
+            continue
+        if ".pdf" in line:
+            if block_lines:
+                yield paper_name, block_lines
+            paper_name = line.strip()
+            block_lines = []
+        else:
+            # Quotes often contain ": " and other YAML syntax
+            if line.startswith("- "):
+                line = f'- "{line[2:]}"'
+            block_lines.append(line)
+    if block_lines:
+        yield paper_name, block_lines
+
+
+def iter_paper_blocks(path: Union[str, Path]) -> Iterator[PaperBlock]:
+    """
+    Yield (paper name, raw YAML) for each paper in the file, reading it line
+    by line.
+    """
+    with open(path) as f:
+        for paper_name, block_lines in paper_block_lines(f):
+            yield paper_name, "".join("\n" + line for line in block_lines)
+
+
+def parse_paper(block: PaperBlock) -> dict:
+    """
+    Turn one paper block into a gold standard row. Takes a single tuple so it
+    can be mapped over a process pool.
+    """
+    paper_name, raw_yaml = block
+    paper_json = yaml.load(raw_yaml)
+    flow = ConsortFlow.parse_obj({"experiments": paper_json["experiments"]})
+    return {
+        "document_id": paper_name,
+        "answer": yaml.dump(flow.dict()),
+        "question_short_name": QUESTION_SHORT_NAME,
+        "quotes": list(paper_json["supporting quotes"]),
+    }
+
+
+def parse_papers(
+    blocks: Iterable[PaperBlock],
+    max_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+) -> Iterator[dict]:
+    """
+    parse_paper over `blocks` in a process pool, yielding rows in input order.
+    At most `max_in_flight` blocks are submitted but not yet yielded, so memory
+    stays flat however many papers the file holds.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        yield from map(parse_paper, blocks)
+        return
+
+    max_in_flight = max_in_flight or max_workers * 4
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending: deque[Future] = deque()
+        for block in blocks:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(parse_paper, block))
+        while pending:
+            yield pending.popleft().result()
+
+
+class GoldStandardWriter:
+    """
+    Write parsed rows to CSV (document_id, answer, question_short_name,
+    quote_1..quote_N) or to Parquet (with a list-typed "quotes" column).
+
+    N isn't known until every row has been seen, so CSV rows are spooled to a
+    JSONL file next to the output and copied over in close(). Parquet rows are
+    written in row groups of `batch_size`.
+    """
+
+    base_columns = ["document_id", "answer", "question_short_name"]
+
+    def __init__(self, path: Union[str, Path], batch_size: int = 256):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self.max_quotes = 0
+        self.is_parquet = self.path.suffix == ".parquet"
+        self._batch: list[dict] = []
+        self._parquet_writer = None
+        self._spool = None
+        if not self.is_parquet:
+            self._spool = tempfile.NamedTemporaryFile(
+                "w+",
+                dir=self.path.parent,
+                prefix=f".{self.path.name}.",
+                suffix=".jsonl",
+            )
+
+    def __enter__(self) -> "GoldStandardWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        elif self._spool is not None:
+            self._spool.close()
+        elif self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+    def write(self, row: dict) -> None:
+        self.rows_written += 1
+        self.max_quotes = max(self.max_quotes, len(row["quotes"]))
+        if self._spool is not None:
+            self._spool.write(json.dumps(row) + "\n")
+            return
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self._flush_parquet()
+
+    def write_all(self, rows: Iterable[dict]) -> int:
+        for row in rows:
+            self.write(row)
+        return self.rows_written
+
+    def _flush_parquet(self) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema(
+            [(column, pa.string()) for column in self.base_columns]
+            + [("quotes", pa.list_(pa.string()))]
+        )
+        table = pa.Table.from_pylist(self._batch, schema=schema)
+        if self._parquet_writer is None:
+            self._parquet_writer = pq.ParquetWriter(self.path, schema)
+        self._parquet_writer.write_table(table)
+        self._batch = []
+
+    def _copy_spool_to_csv(self) -> None:
+        assert self._spool is not None
+        header = self.base_columns + [
+            f"quote_{i + 1}" for i in range(self.max_quotes)
+        ]
+        self._spool.seek(0)
+        with open(self.path, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(header)
+            for line in self._spool:
+                row = json.loads(line)
+                quotes = row["quotes"] + [""] * (self.max_quotes - len(row["quotes"]))
+                writer.writerow([row[column] for column in self.base_columns] + quotes)
+        self._spool.close()
+        self._spool = None
+
+    def close(self) -> None:
+        if self._spool is not None:
+            self._copy_spool_to_csv()
+            return
+        if self._batch or self._parquet_writer is None:
+            self._flush_parquet()
+        self._parquet_writer.close()
+
+
+def convert_experiments_gs(
+    raw_path: Union[str, Path],
+    out_path: Union[str, Path],
+    max_workers: Optional[int] = None,
+) -> int:
+    """
+    Parse every paper in `raw_path` and write the rows to `out_path` (.csv
+    or .parquet). Returns the number of papers written.
+    """
+    with GoldStandardWriter(out_path) as writer:
+        return writer.write_all(
+            parse_papers(iter_paper_blocks(raw_path), max_workers=max_workers)
+        )
@@ -1,31 +1,90 @@
+import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
 from ice.recipes.consort_flow.types import ConsortFlow
 from ice.contrib.ought_shared.utils import MyYAML
 from pydantic import ValidationError
-from pprint import pprint
-
-yaml = MyYAML()
-
-def validate_schema(consort_gs_df: pd.DataFrame) -> None:
-    passed_validation = True
-    
-    for _, row in consort_gs_df.iterrows():
-        # try:
-        answer_yaml = yaml.load(row["answer"])
-        # except ScannerError as e:
-        #     passed_validation = False
-        #     print("scanner error for ", row["document_id"], row["question_short_name"], e)
-        try:
-            ConsortFlow.parse_obj(answer_yaml)
-        except ValidationError as e:
-            passed_validation = False
-            print("validation error for ", row["document_id"], row["question_short_name"], e)
-            pprint(answer_yaml)
-        
-    if not passed_validation:
+from pprint import pformat
+
+yaml = MyYAML(fast=True)
+
+# Below this many answers, starting worker processes costs more than it saves
+MIN_ANSWERS_FOR_POOL = 64
+
+@dataclass
+class FlowValidationError:
+    document_id: str
+    question_short_name: str
+    message: str
+    answer: str
+
+@dataclass
+class FlowValidationReport:
+    # One entry per input row, None where the answer failed to parse
+    flows: list[Optional[ConsortFlow]]
+    errors: list[FlowValidationError] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.errors
+
+def parse_flow(answer: str) -> tuple[Optional[ConsortFlow], Optional[str], Optional[str]]:
+    """
+    Parse one YAML answer into a ConsortFlow. Returns (flow, None, None) on
+    success and (None, error message, formatted answer) on failure.
+    """
+    try:
+        answer_yaml = yaml.load(answer)
+    except Exception as e:
+        return None, f"YAML error: {e}", answer
+    try:
+        return ConsortFlow.parse_obj(answer_yaml), None, None
+    except ValidationError as e:
+        return None, str(e), pformat(answer_yaml)
+
+def validate_flows(consort_gs_df: pd.DataFrame, max_workers: Optional[int] = None) -> FlowValidationReport:
+    """
+    Parse and validate every answer in `consort_gs_df`, spreading the work
+    over a process pool when there are enough answers to make it worthwhile.
+    """
+    answers = consort_gs_df["answer"].tolist()
+    if len(answers) < MIN_ANSWERS_FOR_POOL or max_workers == 1:
+        parsed = [parse_flow(answer) for answer in answers]
+    else:
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(answers) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = list(executor.map(parse_flow, answers, chunksize=chunksize))
+
+    report = FlowValidationReport(flows=[flow for flow, _, _ in parsed])
+    for document_id, question_short_name, (_, message, answer) in zip(
+        consort_gs_df["document_id"], consort_gs_df["question_short_name"], parsed
+    ):
+        if message is not None:
+            report.errors.append(
+                FlowValidationError(document_id, question_short_name, message, answer)
+            )
+    return report
+
+def validate_schema(consort_gs_df: pd.DataFrame, max_workers: Optional[int] = None) -> list[ConsortFlow]:
+    """
+    Validate every answer and return the parsed flows, in row order, so
+    callers don't have to parse the answers again.
+    """
+    report = validate_flows(consort_gs_df, max_workers=max_workers)
+
+    for error in report.errors:
+        print("validation error for ", error.document_id, error.question_short_name, error.message)
+        print(error.answer)
+
+    if not report.passed:
         raise ValueError("Schema validation failed")
-    
+
+    return report.flows
+
 if __name__ == "__main__":
     gs_df = pd.read_csv("gold_standards/gold_standards.csv")
     gs_df = gs_df[gs_df["question_short_name"].isin(["consort_flow", "consort_flow_with_adherence"])]
-    validate_schema(gs_df)
\ No newline at end of file
+    validate_schema(gs_df)
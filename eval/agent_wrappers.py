@@ -0,0 +1,71 @@
+import os
+
+from collections.abc import Callable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from ice.agents.base import Agent
+from ice.contrib.ought_shared import completion_cache
+from ice.contrib.ought_shared.completion_cache import DiskCache
+from ice.contrib.ought_shared.paragraph_synthesis import sub_answers
+from ice.recipe import recipe
+
+
+@contextmanager
+def use_agent(agent: Agent) -> Iterator[Agent]:
+    """
+    Make recipe.agent() return `agent`, whatever agent name is asked for.
+    """
+    previous = recipe.__dict__.get("agent")
+    recipe.agent = lambda agent_name=None: agent  # type: ignore[method-assign]
+    try:
+        yield agent
+    finally:
+        if previous is None:
+            del recipe.agent
+        else:
+            recipe.agent = previous
+
+
+@contextmanager
+def wrap_agents(wrap: Callable[[Agent], Agent]) -> Iterator[None]:
+    """
+    Make recipe.agent() return wrap(agent) for whatever agent it would
+    have returned. Nests with use_agent and with other wrap_agents.
+    """
+    previous = recipe.__dict__.get("agent")
+    get_agent = previous or type(recipe).agent.__get__(recipe)
+    recipe.agent = lambda agent_name=None: wrap(get_agent(agent_name))  # type: ignore[method-assign]
+    try:
+        yield
+    finally:
+        if previous is None:
+            del recipe.agent
+        else:
+            recipe.agent = previous
+
+
+@contextmanager
+def isolated_caches() -> Iterator[None]:
+    """
+    In-memory completion and sub-answer caches that are written but never
+    read, so every call reaches the agent and nothing lands in CACHE_DIR.
+    """
+    previous_cache = completion_cache._completion_cache
+    previous_store = sub_answers._sub_answer_store
+    previous_bypass = os.environ.get("ICE_COMPLETION_CACHE")
+    completion_cache._completion_cache = DiskCache(Path(":memory:"))
+    sub_answers._sub_answer_store = sub_answers.SubAnswerStore(
+        DiskCache(Path(":memory:"))
+    )
+    os.environ["ICE_COMPLETION_CACHE"] = "0"
+    try:
+        yield
+    finally:
+        completion_cache._completion_cache = previous_cache
+        sub_answers._sub_answer_store = previous_store
+        if previous_bypass is None:
+            del os.environ["ICE_COMPLETION_CACHE"]
+        else:
+            os.environ["ICE_COMPLETION_CACHE"] = previous_bypass
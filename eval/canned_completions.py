@@ -0,0 +1,13 @@
+import hashlib
+
+
+def prompt_hash(prompt: str) -> int:
+    return int.from_bytes(hashlib.sha256(prompt.encode()).digest()[:8], "big")
+
+
+def canned_words(prompt: str, n_words: int) -> str:
+    """
+    `n_words` placeholder words derived from `prompt`, the same on every call.
+    """
+    h = prompt_hash(prompt)
+    return " " + " ".join(f"w{(h >> (i % 56)) % 997}" for i in range(n_words))
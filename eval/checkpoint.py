@@ -0,0 +1,128 @@
+import hashlib
+import json
+
+from collections.abc import Hashable
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+
+class CheckpointMismatch(ValueError):
+    pass
+
+
+class CheckpointExists(ValueError):
+    pass
+
+
+def file_identity(path: str | Path) -> str:
+    """
+    The resolved path and a hash of the contents of the input file.
+    """
+    path = Path(path).resolve()
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{path}:{digest.hexdigest()}"
+
+
+def dataframe_identity(df: pd.DataFrame, chunksize: int = 10_000) -> str:
+    """
+    A hash of the input DataFrame's contents, as they'd be written to CSV.
+    Written `chunksize` rows at a time, so the whole input isn't copied into
+    one string.
+    """
+    digest = hashlib.sha256()
+    digest.update(df.iloc[:0].to_csv().encode())
+    for start in range(0, len(df), chunksize):
+        digest.update(df.iloc[start : start + chunksize].to_csv(header=False).encode())
+    return "dataframe:" + digest.hexdigest()
+
+
+class RowCheckpoint:
+    """
+    Append-only JSONL file with one line per finished row, keyed by the row's
+    index in the input. Each line is flushed as soon as the row finishes, so a
+    crashed or interrupted run loses at most the rows that were in flight.
+
+    An existing checkpoint at `path` is only discarded with `overwrite`;
+    without it or `resume`, CheckpointExists is raised so finished rows
+    aren't lost by forgetting --resume. The first line records `input_id`,
+    the identity of the input the rows come from, and resuming a checkpoint
+    written for another input raises CheckpointMismatch rather than mixing
+    rows from both.
+    """
+
+    def __init__(self, path: Path, resume: bool = False, input_id: str = "", overwrite: bool = False):
+        self.path = path
+        self.input_id = input_id
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._done: set[str] = set()
+        if resume and self.path.exists():
+            checkpoint_input = self.read_input_id()
+            if checkpoint_input != input_id:
+                raise CheckpointMismatch(
+                    f"{self.path} was written for input {checkpoint_input!r}, not "
+                    f"{input_id!r}; run with overwrite to start over"
+                )
+            self._done = {key for key, _ in self.read()}
+        elif self.path.exists() and not overwrite:
+            raise CheckpointExists(
+                f"{self.path} already exists; pass resume to continue it or "
+                f"overwrite to start over"
+            )
+        else:
+            self.path.write_text(json.dumps({"input": input_id}) + "\n")
+        self._file = self.path.open("a")
+        if not self._ends_with_newline():
+            self._file.write("\n")
+
+    def _ends_with_newline(self) -> bool:
+        with self.path.open("rb") as f:
+            if f.seek(0, 2) == 0:
+                return True
+            f.seek(-1, 2)
+            return f.read(1) == b"\n"
+
+    def is_done(self, key: Hashable) -> bool:
+        return str(key) in self._done
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def append(self, key: Hashable, result: Any) -> None:
+        self._file.write(json.dumps({"row": str(key), "result": result}, default=str))
+        self._file.write("\n")
+        self._file.flush()
+        self._done.add(str(key))
+
+    def read_input_id(self) -> str | None:
+        with self.path.open() as f:
+            try:
+                return json.loads(f.readline()).get("input")
+            except json.JSONDecodeError:
+                return None
+
+    def read(self) -> Iterator[tuple[str, Any]]:
+        with self.path.open() as f:
+            for line in f:
+                # A run killed mid-write can leave a truncated last line
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "row" in entry:
+                    yield entry["row"], entry["result"]
+
+    def results(self, keys: list[Hashable]) -> list[Any]:
+        """
+        Return the checkpointed results in the order of `keys`.
+        """
+        results = dict(self.read())
+        return [results[str(key)] for key in keys if str(key) in results]
+
+    def close(self) -> None:
+        self._file.close()
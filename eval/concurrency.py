@@ -0,0 +1,184 @@
+import time
+
+from collections import deque
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import Optional
+from typing import TypeVar
+
+import anyio
+import httpx
+
+InputType = TypeVar("InputType")
+ReturnType = TypeVar("ReturnType")
+
+OVERLOAD_STATUS_CODES = {429, 503}
+
+
+def is_overload_error(e: BaseException) -> bool:
+    """
+    Rate limits and timeouts: errors that mean "send fewer requests", as
+    opposed to errors in the request itself.
+    """
+    if isinstance(e, (TimeoutError, httpx.TimeoutException)):
+        return True
+    response = getattr(e, "response", None)
+    status_code = getattr(response, "status_code", getattr(e, "status_code", None))
+    return status_code in OVERLOAD_STATUS_CODES or type(e).__name__ == "RateLimitError"
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit for LM-bound calls.
+
+    The limit grows by `increase` once per `limit` successful calls (roughly
+    one step per round trip) while latency stays under `target_latency`, and
+    is multiplied by `decrease_factor` on rate-limit/timeout errors or when
+    the latency EWMA goes over the target. At most one decrease happens per
+    round trip, so a burst of 429s from the same window backs off once.
+    Overloaded calls are retried up to `max_retries` times after a backoff;
+    other errors are raised as-is.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        target_latency: Optional[float] = None,
+        increase: float = 1,
+        decrease_factor: float = 0.5,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        throughput_window: float = 60.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.throughput_window = throughput_window
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._condition = anyio.Condition()
+        self._latency_ewma: Optional[float] = None
+        self._last_decrease = 0.0
+        self._completions: deque[float] = deque()
+        self.completed = 0
+        self.failed = 0
+        self.overloaded = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def throughput(self) -> float:
+        """
+        Successful calls per second over the last `throughput_window` seconds.
+        """
+        now = time.monotonic()
+        while self._completions and self._completions[0] < now - self.throughput_window:
+            self._completions.popleft()
+        if not self._completions:
+            return 0.0
+        return len(self._completions) / max(now - self._completions[0], 1e-3)
+
+    def metrics(self) -> dict[str, float]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "throughput": self.throughput,
+            "latency_ewma": self._latency_ewma or 0.0,
+            "completed": self.completed,
+            "failed": self.failed,
+            "overloaded": self.overloaded,
+        }
+
+    def _on_success(self, latency: float) -> None:
+        self.completed += 1
+        self._completions.append(time.monotonic())
+        self._latency_ewma = (
+            latency
+            if self._latency_ewma is None
+            else 0.8 * self._latency_ewma + 0.2 * latency
+        )
+        if self.target_latency is not None and self._latency_ewma > self.target_latency:
+            self._decrease()
+        else:
+            self._limit = min(
+                self.max_limit, self._limit + self.increase / max(self._limit, 1)
+            )
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < (self._latency_ewma or 0.0):
+            return
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.decrease_factor)
+
+    async def _acquire(self) -> None:
+        async with self._condition:
+            while self._in_flight >= self.limit:
+                await self._condition.wait()
+            self._in_flight += 1
+
+    async def _release(self) -> None:
+        # Shielded, so a cancelled call still gives its slot back
+        with anyio.CancelScope(shield=True):
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    async def run(
+        self, fn: Callable[[InputType], Awaitable[ReturnType]], input: InputType
+    ) -> ReturnType:
+        for attempt in range(self.max_retries + 1):
+            await self._acquire()
+            start = time.monotonic()
+            try:
+                result = await fn(input)
+            except Exception as e:
+                if not is_overload_error(e):
+                    self.failed += 1
+                    raise
+                self.overloaded += 1
+                self._decrease()
+                if attempt == self.max_retries:
+                    self.failed += 1
+                    raise
+            else:
+                self._on_success(time.monotonic() - start)
+                return result
+            finally:
+                await self._release()
+            await anyio.sleep(self.retry_backoff * 2**attempt)
+        raise AssertionError("unreachable")
+
+
+async def map_async_adaptive(
+    input_list: Sequence[InputType],
+    fn: Callable[[InputType], Awaitable[ReturnType]],
+    concurrency: Optional[AdaptiveConcurrency] = None,
+) -> list[ReturnType]:
+    """
+    Drop-in for ice.utils.map_async with an adaptive instead of a fixed limit.
+    """
+    concurrency = concurrency or AdaptiveConcurrency()
+    results: list = [None] * len(input_list)
+
+    async def run_one(i: int) -> None:
+        results[i] = await concurrency.run(fn, input_list[i])
+
+    async with anyio.create_task_group() as tg:
+        for i in range(len(input_list)):
+            tg.start_soon(run_one, i)
+    return results
@@ -1,42 +1,163 @@
+from typing import Optional
+
 import pandas as pd
 
+from ice.contrib.ought_shared.completion_cache import completion_flight
+from ice.contrib.ought_shared.eval.agent_wrappers import wrap_agents
+from ice.contrib.ought_shared.eval.concurrency import AdaptiveConcurrency
+from ice.contrib.ought_shared.eval.concurrency import map_async_adaptive
+from ice.contrib.ought_shared.eval.run_metrics import RunMetrics
+from ice.contrib.ought_shared.eval.run_metrics import stage
+from ice.contrib.ought_shared.eval.token_meter import TokenBudgetExceeded
+from ice.contrib.ought_shared.eval.token_meter import TokenMeter
+from ice.contrib.ought_shared.eval.token_meter import TokenUsage
+from ice.contrib.ought_shared.paragraph_synthesis.sub_answers import sub_answer_store
+from ice.contrib.ought_shared.singleflight import CoalescingAgent
+from ice.contrib.ought_shared.singleflight import SingleFlight
 from ice.evaluation.evaluate_recipe_result import EvaluatedRecipeResult
 from ice.evaluation.evaluate_recipe_result import RecipeResult
 from ice.evaluation.evaluation_report import EvaluationReport
 from ice.recipe import Recipe
 from ice.utils import map_async
 
+# Answer of a row that wasn't run because of the token budget
+SKIPPED = object()
+
 
-def make_recipe_result(row: pd.Series) -> RecipeResult:
+def make_recipe_result(row: pd.Series | dict) -> RecipeResult:
     return RecipeResult(
-        question_short_name=row.question_short_name,
+        question_short_name=row["question_short_name"],
         document_id=row.get("document_id", ""),
-        answer="" if pd.isna(row.answer) else row.answer,
+        answer="" if pd.isna(row["answer"]) else row["answer"],
         experiment=row.get("experiment", ""),
         excerpts=row.get("excerpts", []),
     )
 
 
-async def run_recipe_on_row(row: pd.Series, recipe_to_run: Recipe):
+async def run_recipe_on_row(row: pd.Series | dict, recipe_to_run: Recipe):
     return await recipe_to_run(**row)
 
 
-async def run_over_gs(
-    recipe_to_run: Recipe, gs_df: pd.DataFrame, splits: list[str]
-) -> EvaluationReport:
-    answers_df = gs_df.copy()
+async def evaluate_recipe_result(recipe_result: RecipeResult) -> EvaluatedRecipeResult:
+    with stage("evaluate"):
+        return await EvaluatedRecipeResult.from_recipe_result(recipe_result)
 
-    answers_df = answers_df[answers_df.split.isin(splits)].reset_index(drop=True)
 
-    answers_df["answer"] = await map_async(
-        [row for _, row in answers_df.iterrows()],
-        lambda row: run_recipe_on_row(row, recipe_to_run),
-    )
-    recipe_results = answers_df.apply(make_recipe_result, axis=1)
-    evaluation_report = EvaluationReport(
-        technique_name=recipe_to_run.__name__,
-        results=await map_async(
-            recipe_results, EvaluatedRecipeResult.from_recipe_result
-        ),
+async def run_recipes_over_gs(
+    recipes_to_run: list[Recipe],
+    gs_df: pd.DataFrame,
+    splits: list[str],
+    concurrency: Optional[AdaptiveConcurrency] = None,
+    metrics: Optional[RunMetrics] = None,
+    token_budget: Optional[int] = None,
+    meter: Optional[TokenMeter] = None,
+) -> pd.DataFrame:
+    """
+    Evaluate several recipes on the same gold standard rows. All (recipe, row)
+    pairs share one concurrency budget, so the run takes about as long as the
+    slowest recipe rather than the sum of all of them.
+
+    Each row's prompt and completion tokens are added as columns. Once
+    `token_budget` would be exceeded, no new rows are started and the rows
+    that didn't run are left out of the evaluation.
+
+    Identical LM calls in flight at the same time, e.g. abstract_qa on an
+    abstract shared by several rows, are sent once. How many calls were
+    coalesced, by the agent wrapper and by the cached_complete and
+    sub-answer caches, is in attrs["coalescing"].
+
+    The summaries of `metrics` (one row per (recipe, row) pair) and of the
+    token usage are attached to the returned DataFrame as
+    attrs["run_metrics"] and attrs["token_usage"].
+    """
+    answers_df = gs_df[gs_df.split.isin(splits)].reset_index(drop=True)
+
+    # Plain dicts rather than iterrows(), which builds a pd.Series per row
+    rows = answers_df.to_dict("records")
+    jobs = [
+        (recipe_to_run, i, row)
+        for recipe_to_run in recipes_to_run
+        for i, row in enumerate(rows)
+    ]
+    metrics = metrics or RunMetrics("run_over_gs")
+    metrics.total_rows = len(jobs)
+    meter = meter or TokenMeter(budget=token_budget)
+    flights = {
+        "agent": SingleFlight(),
+        "cached_complete": completion_flight,
+        "sub_answers": sub_answer_store().flight,
+    }
+    flight_stats = {name: flight.stats() for name, flight in flights.items()}
+
+    async def run_job(job: tuple[Recipe, int, dict]):
+        recipe_to_run, i, row = job
+        if not meter.can_dispatch():
+            meter.rows_skipped += 1
+            return SKIPPED
+        try:
+            with metrics.track_row(), meter.track_row(
+                recipe=recipe_to_run.__name__, row=str(i)
+            ):
+                return await run_recipe_on_row(row, recipe_to_run)
+        except TokenBudgetExceeded:
+            meter.rows_skipped += 1
+            return SKIPPED
+
+    # Outermost, so coalesced calls aren't metered twice
+    coalesce = wrap_agents(lambda agent: CoalescingAgent(agent, flights["agent"]))
+    with metrics.activate(), meter.activate(), coalesce:
+        answers = await map_async_adaptive(jobs, run_job, concurrency)
+
+        evaluation_dfs = []
+        row_usage = meter.usage_by("recipe", "row")
+        for i, recipe_to_run in enumerate(recipes_to_run):
+            recipe_answers = answers[i * len(rows) : (i + 1) * len(rows)]
+            answered = [
+                (row_index, row, answer)
+                for row_index, (row, answer) in enumerate(zip(rows, recipe_answers))
+                if answer is not SKIPPED
+            ]
+            with stage("make_recipe_result"):
+                recipe_results = [
+                    make_recipe_result({**row, "answer": answer})
+                    for _, row, answer in answered
+                ]
+            evaluation_report = EvaluationReport(
+                technique_name=recipe_to_run.__name__,
+                results=await map_async(recipe_results, evaluate_recipe_result),
+            )
+            with stage("evaluation_df"):
+                evaluation_df = evaluation_report.make_experiments_evaluation_df()
+            usages = [
+                row_usage.get((recipe_to_run.__name__, str(row_index)), TokenUsage())
+                for row_index, _, _ in answered
+            ]
+            evaluation_df["prompt_tokens"] = [usage.prompt_tokens for usage in usages]
+            evaluation_df["completion_tokens"] = [
+                usage.completion_tokens for usage in usages
+            ]
+            evaluation_dfs.append(evaluation_df)
+    evaluation_df = pd.concat(evaluation_dfs, ignore_index=True)
+    evaluation_df.attrs["run_metrics"] = metrics.summary()
+    evaluation_df.attrs["token_usage"] = meter.summary()
+    evaluation_df.attrs["coalescing"] = {
+        name: {
+            stat: value - flight_stats[name][stat]
+            for stat, value in flight.stats().items()
+        }
+        for name, flight in flights.items()
+    }
+    return evaluation_df
+
+
+async def run_over_gs(
+    recipe_to_run: Recipe,
+    gs_df: pd.DataFrame,
+    splits: list[str],
+    concurrency: Optional[AdaptiveConcurrency] = None,
+    metrics: Optional[RunMetrics] = None,
+    token_budget: Optional[int] = None,
+) -> pd.DataFrame:
+    return await run_recipes_over_gs(
+        [recipe_to_run], gs_df, splits, concurrency, metrics, token_budget
     )
-    return evaluation_report.make_experiments_evaluation_df()
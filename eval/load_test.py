@@ -0,0 +1,148 @@
+import json
+import time
+
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Optional
+
+import pandas as pd
+
+from ice.contrib.ought_shared.eval.agent_wrappers import isolated_caches
+from ice.contrib.ought_shared.eval.agent_wrappers import use_agent
+from ice.contrib.ought_shared.eval.concurrency import AdaptiveConcurrency
+from ice.contrib.ought_shared.eval.run_over_csv import run_recipe_on_row
+from ice.contrib.ought_shared.eval.simulated_agent import LatencyProfile
+from ice.contrib.ought_shared.eval.simulated_agent import SimulatedAgent
+from ice.recipe import FunctionBasedRecipe
+from ice.recipe import Recipe
+from ice.recipe import recipe
+from ice.utils import map_async
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+@dataclass
+class LoadTestReport:
+    rows: int
+    succeeded: int
+    wall_seconds: float
+    rows_per_second: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    # Mean rows in flight over the concurrency limit (the final limit when
+    # it's adaptive)
+    utilization: float
+    errors: dict[str, int] = field(default_factory=dict)
+    agent: dict[str, float] = field(default_factory=dict)
+    concurrency: dict[str, float] = field(default_factory=dict)
+
+
+async def load_test(
+    rows: Sequence[dict],
+    recipe_to_run: Recipe,
+    agent: SimulatedAgent,
+    max_concurrency: Optional[int] = None,
+    concurrency: Optional[AdaptiveConcurrency] = None,
+) -> LoadTestReport:
+    """
+    Run `recipe_to_run` over `rows` against `agent`, with a fixed
+    `max_concurrency` or, if that's None, an adaptive `concurrency` limit.
+    Caches are isolated for the run, so every row reaches the agent.
+    """
+    if max_concurrency is None:
+        concurrency = concurrency or AdaptiveConcurrency()
+    latencies: list[float] = []
+    busy_seconds = 0.0
+    errors: Counter[str] = Counter()
+
+    async def run_gated(row: dict) -> None:
+        nonlocal busy_seconds
+        start = time.monotonic()
+        try:
+            await run_recipe_on_row(row, recipe_to_run)
+        finally:
+            busy_seconds += time.monotonic() - start
+
+    async def run_row(row: dict) -> None:
+        start = time.monotonic()
+        try:
+            if concurrency is None:
+                await run_gated(row)
+            else:
+                await concurrency.run(run_gated, row)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        else:
+            latencies.append(time.monotonic() - start)
+
+    with isolated_caches(), use_agent(agent):
+        start = time.monotonic()
+        # With an adaptive limit, concurrency.run does the gating
+        await map_async(list(rows), run_row, max_concurrency=max_concurrency)
+        wall_seconds = time.monotonic() - start
+
+    latencies.sort()
+    limit = concurrency.limit if concurrency is not None else max_concurrency
+    return LoadTestReport(
+        rows=len(rows),
+        succeeded=len(latencies),
+        wall_seconds=wall_seconds,
+        rows_per_second=len(latencies) / wall_seconds if wall_seconds else 0.0,
+        latency_p50=percentile(latencies, 50),
+        latency_p95=percentile(latencies, 95),
+        latency_p99=percentile(latencies, 99),
+        utilization=busy_seconds / wall_seconds / limit if wall_seconds else 0.0,
+        errors=dict(errors),
+        agent=agent.stats(),
+        concurrency=concurrency.metrics() if concurrency is not None else {},
+    )
+
+
+async def load_test_cli(
+    df: pd.DataFrame = "",
+    recipe: FunctionBasedRecipe = "",
+    concurrency: int = 0,
+    latency: str = "lognormal",
+    median_latency: float = 0.5,
+    tokens_per_second: float = 50.0,
+    rate_limit_per_minute: int = 0,
+    max_concurrent: int = 0,
+    error_rate: float = 0.0,
+    timeout_rate: float = 0.0,
+    time_scale: float = 1.0,
+    seed: int = 0,
+):
+    """
+    Load test a recipe over the rows of a CSV against a simulated LM. Pass
+    --concurrency 0 for the adaptive limit run_over_csv uses.
+    """
+    agent = SimulatedAgent(
+        latency=LatencyProfile(distribution=latency, median=median_latency),  # type: ignore[arg-type]
+        tokens_per_second=tokens_per_second,
+        rate_limit_per_minute=rate_limit_per_minute or None,
+        max_concurrent=max_concurrent or None,
+        error_rate=error_rate,
+        timeout_rate=timeout_rate,
+        time_scale=time_scale,
+        seed=seed,
+    )
+    report = await load_test(
+        df.to_dict("records"),
+        recipe,
+        agent,
+        max_concurrency=concurrency or None,
+    )
+    print(json.dumps(asdict(report), indent=2))
+    return report
+
+
+recipe.main(load_test_cli)
@@ -0,0 +1,128 @@
+import ast
+import dataclasses
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+from typing import Literal
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+
+from pydantic import BaseModel
+
+OutputFormat = Literal["csv", "parquet"]
+OUTPUT_FORMATS: tuple[str, ...] = ("csv", "parquet")
+
+# Stored as lists of strings in Parquet, even if they were read back from a
+# CSV as their string repr
+LIST_COLUMNS = frozenset(["excerpts"])
+
+
+def check_output_format(output_format: str) -> OutputFormat:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unknown output format {output_format!r}, expected one of {OUTPUT_FORMATS}"
+        )
+    return output_format  # type: ignore[return-value]
+
+
+def arrow_value(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, (list, tuple)):
+        return [arrow_value(item) for item in value]
+    return value
+
+
+def as_list(value: Any) -> Any:
+    """
+    A list from its string repr, e.g. as read back from a CSV. Other values,
+    including strings that only start with "[" (like "[1] Smith et al."),
+    are returned as they are.
+    """
+    if isinstance(value, str) and value.startswith("["):
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return value
+        if isinstance(parsed, list):
+            return parsed
+    return value
+
+
+def arrow_compatible(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A copy of `df` that pyarrow can store: dataclasses (e.g. Abstract) and
+    pydantic models become structs, and LIST_COLUMNS become lists. Object
+    columns that still mix types are stored as strings, as CSV would.
+    """
+    import pyarrow as pa
+
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        if column in LIST_COLUMNS:
+            df[column] = df[column].map(as_list)
+        df[column] = df[column].map(arrow_value)
+        try:
+            pa.array(df[column], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[column] = df[column].map(lambda value: None if value is None else str(value))
+    return df
+
+
+def output_path(path: Union[str, Path], output_format: str) -> Path:
+    path = Path(path)
+    return path.with_name(f"{path.name}.{check_output_format(output_format)}")
+
+
+def write_results(
+    df: pd.DataFrame,
+    path: Union[str, Path],
+    output_format: str = "csv",
+    index: bool = True,
+) -> Path:
+    """
+    Write `df` to `path` plus the format's extension and return the full
+    path. Parquet files are zstd-compressed.
+    """
+    path = output_path(path, output_format)
+    if output_format == "csv":
+        df.to_csv(path, index=index)
+    else:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(arrow_compatible(df), preserve_index=index)
+        pq.write_table(table, path, compression="zstd")
+    return path
+
+
+def read_results(
+    path: Union[str, Path],
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[list] = None,
+) -> pd.DataFrame:
+    """
+    Read a file written by write_results. Parquet files are memory-mapped and
+    only the requested `columns` are read; `filters` are pyarrow filter
+    expressions like [("technique", "==", "synthesize")].
+    """
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(
+            path,
+            columns=list(columns) if columns is not None else None,
+            filters=filters,
+            memory_map=True,
+        ).to_pandas()
+    if filters is not None:
+        raise ValueError("filters are only supported for Parquet files")
+    return pd.read_csv(path, usecols=columns)
@@ -0,0 +1,289 @@
+import bisect
+import json
+import os
+import time
+
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+from typing import Optional
+from typing import Union
+
+from ice.agents.base import Agent
+from ice.contrib.ought_shared.eval.agent_wrappers import wrap_agents
+from ice.contrib.ought_shared.eval.concurrency import is_overload_error
+
+# Upper bounds in seconds, as in a Prometheus histogram
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket the q-th quantile falls in (the largest
+        bucket bound for values past the last one).
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], self.counts)),
+        }
+
+
+class _StageFrame:
+    __slots__ = ("name", "child_seconds")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.child_seconds = 0.0
+
+
+_active_metrics: ContextVar[Optional["RunMetrics"]] = ContextVar(
+    "run_metrics", default=None
+)
+_current_stage: ContextVar[Optional[_StageFrame]] = ContextVar(
+    "run_metrics_stage", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time the block as stage `name` of the active RunMetrics, if any. Time
+    spent in nested stages only counts towards the innermost one, so stage
+    totals add up to the instrumented time.
+    """
+    metrics = _active_metrics.get()
+    if metrics is None:
+        yield
+        return
+    parent = _current_stage.get()
+    frame = _StageFrame(name)
+    token = _current_stage.set(frame)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_stage.reset(token)
+        if parent is not None:
+            parent.child_seconds += elapsed
+        metrics.observe_stage(name, max(0.0, elapsed - frame.child_seconds))
+
+
+class StageTimedAgent(Agent):
+    """
+    Times every call to the wrapped agent as the "lm" stage.
+    """
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.model = getattr(agent, "model", None) or type(agent).__name__
+
+    async def complete(self, **kwargs) -> str:
+        with stage("lm"):
+            return await self.agent.complete(**kwargs)
+
+    async def classify(self, **kwargs):
+        with stage("lm"):
+            return await self.agent.classify(**kwargs)
+
+    async def relevance(self, **kwargs) -> float:
+        with stage("lm"):
+            return await self.agent.relevance(**kwargs)
+
+    async def predict(self, **kwargs) -> dict[str, float]:
+        with stage("lm"):
+            return await self.agent.predict(**kwargs)
+
+
+class RunMetrics:
+    """
+    Live metrics for a runner: rows per second, rows in flight, a row
+    latency histogram, stage timings (see `stage`), errors by type (one per
+    failed attempt, including retried rate limits) and an ETA when
+    `total_rows` is known.
+
+    Inside `activate()`, agents from recipe.agent() are timed as the "lm"
+    stage and the metrics are written to `path` at most every
+    `flush_interval` seconds as rows finish: Prometheus text if `path` ends
+    in .prom, JSON otherwise.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        total_rows: Optional[int] = None,
+        path: Union[str, Path, None] = None,
+        flush_interval: float = 10.0,
+    ):
+        self.name = name
+        self.total_rows = total_rows
+        self.path = Path(path) if path is not None else None
+        self.flush_interval = flush_interval
+
+        self.started = time.monotonic()
+        self.rows_done = 0
+        self.rows_failed = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.row_latency = Histogram()
+        self.stages: dict[str, Histogram] = {}
+        self.errors: Counter[str] = Counter()
+        self._last_flush = self.started
+
+    @contextmanager
+    def activate(self) -> Iterator["RunMetrics"]:
+        self.started = self._last_flush = time.monotonic()
+        token = _active_metrics.set(self)
+        try:
+            with wrap_agents(StageTimedAgent):
+                yield self
+        finally:
+            _active_metrics.reset(token)
+            self.flush()
+
+    @contextmanager
+    def track_row(self) -> Iterator[None]:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.errors[type(e).__name__] += 1
+            # AdaptiveConcurrency retries these, so the row isn't done yet
+            if not is_overload_error(e):
+                self.rows_failed += 1
+            raise
+        else:
+            self.rows_done += 1
+        finally:
+            self.in_flight -= 1
+            self.row_latency.observe(time.monotonic() - start)
+            self.maybe_flush()
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        if name not in self.stages:
+            self.stages[name] = Histogram()
+        self.stages[name].observe(seconds)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows_done / elapsed if elapsed else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if self.total_rows is None or not self.rows_per_second:
+            return None
+        remaining = self.total_rows - self.rows_done - self.rows_failed
+        return max(0, remaining) / self.rows_per_second
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "elapsed_seconds": self.elapsed,
+            "total_rows": self.total_rows,
+            "rows_done": self.rows_done,
+            "rows_failed": self.rows_failed,
+            "rows_per_second": self.rows_per_second,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "eta_seconds": self.eta_seconds,
+            "row_latency": self.row_latency.summary(),
+            "stages": {
+                name: histogram.summary() for name, histogram in self.stages.items()
+            },
+            "errors": dict(self.errors),
+        }
+
+    def to_prometheus(self) -> str:
+        labels = f'run="{self.name}"'
+        lines = [
+            f"ice_run_rows_done{{{labels}}} {self.rows_done}",
+            f"ice_run_rows_failed{{{labels}}} {self.rows_failed}",
+            f"ice_run_rows_in_flight{{{labels}}} {self.in_flight}",
+            f"ice_run_rows_per_second{{{labels}}} {self.rows_per_second}",
+        ]
+        if self.total_rows is not None:
+            lines.append(f"ice_run_rows_total{{{labels}}} {self.total_rows}")
+        if self.eta_seconds is not None:
+            lines.append(f"ice_run_eta_seconds{{{labels}}} {self.eta_seconds}")
+        for error, count in self.errors.items():
+            lines.append(f'ice_run_errors{{{labels},type="{error}"}} {count}')
+        lines += _prometheus_histogram("ice_run_row_seconds", labels, self.row_latency)
+        for name, histogram in self.stages.items():
+            lines += _prometheus_histogram(
+                "ice_run_stage_seconds", f'{labels},stage="{name}"', histogram
+            )
+        return "\n".join(lines) + "\n"
+
+    def maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if self.path is None:
+            return
+        write_metrics(self, self.path)
+
+
+def _prometheus_histogram(metric: str, labels: str, histogram: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip([*map(str, histogram.buckets), "+Inf"], histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+    lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def write_metrics(metrics: RunMetrics, path: Union[str, Path]) -> Path:
+    """
+    Atomically write Prometheus text if `path` ends in .prom, else JSON.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".prom":
+        text = metrics.to_prometheus()
+    else:
+        text = json.dumps(metrics.summary(), indent=2)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+    return path
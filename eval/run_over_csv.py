@@ -1,25 +1,119 @@
+import json
+from collections.abc import Iterable
+from itertools import islice
 from ice.recipe import Recipe, recipe, FunctionBasedRecipe
 import pandas as pd
+from pathlib import Path
+from ice.contrib.ought_shared.eval.checkpoint import RowCheckpoint
+from ice.contrib.ought_shared.eval.checkpoint import dataframe_identity
+from ice.contrib.ought_shared.eval.checkpoint import file_identity
+from ice.contrib.ought_shared.eval.concurrency import AdaptiveConcurrency
+from ice.contrib.ought_shared.eval.output_formats import check_output_format
+from ice.contrib.ought_shared.eval.output_formats import write_results
+from ice.contrib.ought_shared.eval.run_metrics import RunMetrics
+from ice.contrib.ought_shared.eval.run_metrics import write_metrics
+from ice.contrib.ought_shared.eval.streaming import Record
+from ice.contrib.ought_shared.eval.streaming import iter_csv_records
+from ice.contrib.ought_shared.eval.streaming import iter_df_records
+from ice.contrib.ought_shared.eval.streaming import map_records_bounded
+from ice.contrib.ought_shared.eval.token_meter import TokenBudgetExceeded
+from ice.contrib.ought_shared.eval.token_meter import TokenMeter
 from ice.contrib.ought_shared.utils import script_run_time
-from ice.utils import map_async
 
-async def run_recipe_on_row(row: pd.Series, recipe_to_run: Recipe):
+async def run_recipe_on_row(row: pd.Series | dict, recipe_to_run: Recipe):
     return await recipe_to_run(**row)
 
-async def run_over_csv(df: pd.DataFrame, recipe: Recipe, test: bool = False):
+async def run_over_records(records: Iterable[Record], recipe: Recipe, test: bool = False, resume: bool = False, concurrency: AdaptiveConcurrency | None = None, output_format: str = "csv", total_rows: int | None = None, metrics_path: str = "", token_budget: int | None = None, input_id: str = "", overwrite: bool = False):
+    check_output_format(output_format)
     if test == True:
-        df = df[:3]
+        records = islice(records, 3)
 
-    results = await map_async(
-        [row for _, row in df.iterrows()],
-        lambda row: run_recipe_on_row(row, recipe),
-        max_concurrency=5
+    concurrency = concurrency or AdaptiveConcurrency()
+
+    # Rows are appended to the checkpoint as they finish; with resume=True,
+    # rows already in it from an earlier (interrupted) run over the same
+    # input (input_id) are skipped. An existing checkpoint is only replaced
+    # with overwrite=True.
+    checkpoint = RowCheckpoint(
+        Path(f"data/{recipe.__name__}{' test' if test else ''}.checkpoint.jsonl"),
+        resume=resume,
+        input_id=input_id,
+        overwrite=overwrite,
+    )
+    keys = []
+
+    # Flushed to metrics_path (default: next to the checkpoint) while the run
+    # goes, and written next to the results at the end
+    if total_rows is not None:
+        total_rows = max(0, (min(total_rows, 3) if test else total_rows) - len(checkpoint))
+    metrics = RunMetrics(
+        recipe.__name__,
+        total_rows=total_rows,
+        path=metrics_path or checkpoint.path.with_name(f"{recipe.__name__}{' test' if test else ''}.metrics.json"),
     )
-    
-    results_df = pd.DataFrame(results)
-    results_df.to_csv(f"data/{script_run_time} {recipe.__name__}.csv")
 
-async def run_over_csv_cli(df: pd.DataFrame="", recipe: FunctionBasedRecipe="", test: bool=False):
-    return await run_over_csv(df=df, recipe=recipe, test=test)
+    # With a token budget, no new rows are started once it would be exceeded;
+    # rows that didn't run aren't checkpointed, so resume=True picks them up
+    meter = TokenMeter(budget=token_budget)
+
+    def pending_records():
+        for index, row in records:
+            if not meter.can_dispatch():
+                return
+            keys.append(index)
+            if not checkpoint.is_done(index):
+                yield index, row
+
+    async def run_and_checkpoint(record: Record):
+        index, row = record
+        try:
+            with meter.track_row(recipe=recipe.__name__, row=str(index)):
+                result = await concurrency.run(run_tracked, row)
+        except TokenBudgetExceeded:
+            meter.rows_skipped += 1
+            return
+        checkpoint.append(index, result)
+
+    async def run_tracked(row: dict):
+        with metrics.track_row():
+            return await run_recipe_on_row(row, recipe)
+
+    try:
+        with metrics.activate(), meter.activate():
+            await map_records_bounded(
+                pending_records(),
+                run_and_checkpoint,
+                max_concurrency=concurrency.max_limit
+            )
+    finally:
+        checkpoint.close()
+
+    results_df = pd.DataFrame(checkpoint.results(keys))
+    output = write_results(results_df, f"data/{script_run_time} {recipe.__name__}", output_format)
+    write_metrics(metrics, output.with_name(f"{output.name}.metrics.json"))
+    output.with_name(f"{output.name}.usage.json").write_text(json.dumps(meter.summary(), indent=2))
+
+async def run_over_csv(df: pd.DataFrame, recipe: Recipe, test: bool = False, resume: bool = False, concurrency: AdaptiveConcurrency | None = None, output_format: str = "csv", metrics_path: str = "", token_budget: int | None = None, overwrite: bool = False):
+    await run_over_records(iter_df_records(df), recipe=recipe, test=test, resume=resume, concurrency=concurrency, output_format=output_format, total_rows=len(df), metrics_path=metrics_path, token_budget=token_budget, input_id=dataframe_identity(df), overwrite=overwrite)
+
+async def run_over_csv_file(path: str, recipe: Recipe, test: bool = False, resume: bool = False, chunksize: int = 1000, concurrency: AdaptiveConcurrency | None = None, output_format: str = "csv", metrics_path: str = "", token_budget: int | None = None, overwrite: bool = False):
+    """
+    Like run_over_csv, but reads the CSV in chunks while the recipe runs
+    instead of loading it into a DataFrame first.
+    """
+    await run_over_records(iter_csv_records(path, chunksize), recipe=recipe, test=test, resume=resume, concurrency=concurrency, output_format=output_format, metrics_path=metrics_path, token_budget=token_budget, input_id=file_identity(path), overwrite=overwrite)
+
+async def run_over_csv_cli(df: pd.DataFrame="", recipe: FunctionBasedRecipe="", test: bool=False, resume: bool=False, stream: str="", output_format: str="csv", metrics_path: str="", token_budget: int=0, overwrite: bool=False):
+    """
+    --metrics-path: where live metrics are flushed while the run goes, as
+    Prometheus text if it ends in .prom and JSON otherwise.
+    --token-budget: stop starting rows once this many prompt + completion
+    tokens would be exceeded (0 for no budget).
+    --overwrite: start over even if a checkpoint from an earlier run exists
+    (without it or --resume, the run refuses to start).
+    """
+    if stream:
+        return await run_over_csv_file(path=stream, recipe=recipe, test=test, resume=resume, output_format=output_format, metrics_path=metrics_path, token_budget=token_budget or None, overwrite=overwrite)
+    return await run_over_csv(df=df, recipe=recipe, test=test, resume=resume, output_format=output_format, metrics_path=metrics_path, token_budget=token_budget or None, overwrite=overwrite)
 
 recipe.main(run_over_csv_cli)
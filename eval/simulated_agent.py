@@ -0,0 +1,217 @@
+import math
+import random
+import time
+
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Literal
+from typing import Optional
+from typing import Union
+
+import anyio
+
+from ice.agents.base import Agent
+from ice.agents.base import Stop
+from ice.contrib.ought_shared.eval.canned_completions import canned_words
+from ice.contrib.ought_shared.eval.canned_completions import prompt_hash
+
+
+class SimulatedRateLimitError(Exception):
+    status_code = 429
+
+
+class SimulatedServerError(Exception):
+    status_code = 500
+
+
+@dataclass
+class LatencyProfile:
+    """
+    Time to first token, in seconds. `pareto` has a heavy tail; the smaller
+    `tail_alpha`, the heavier. All distributions have the given `median`.
+    """
+
+    distribution: Literal["constant", "uniform", "lognormal", "pareto"] = "lognormal"
+    median: float = 0.5
+    # lognormal sigma, or uniform half-width as a fraction of the median
+    spread: float = 0.5
+    tail_alpha: float = 1.5
+    max_latency: float = 120.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.distribution == "constant":
+            latency = self.median
+        elif self.distribution == "uniform":
+            latency = rng.uniform(
+                self.median * (1 - self.spread), self.median * (1 + self.spread)
+            )
+        elif self.distribution == "lognormal":
+            latency = rng.lognormvariate(math.log(self.median), self.spread)
+        elif self.distribution == "pareto":
+            scale = self.median / 2 ** (1 / self.tail_alpha)
+            latency = scale * rng.paretovariate(self.tail_alpha)
+        else:
+            raise ValueError(f"Unknown latency distribution {self.distribution!r}")
+        return min(max(latency, 0.0), self.max_latency)
+
+
+class SimulatedAgent(Agent):
+    """
+    Local stand-in for an LM API, for load testing without spending money.
+
+    Each call waits for a sampled time to first token plus completion tokens
+    at `tokens_per_second`. Calls over `rate_limit_per_minute` or over
+    `max_concurrent` in flight fail with a 429, and `error_rate`/
+    `timeout_rate` of calls fail with a 500 or a TimeoutError. Completions
+    come from `canned` (a prompt -> completion mapping or function) or are
+    derived from the prompt. Randomness is seeded per prompt, so results
+    don't depend on scheduling order. `time_scale` scales every wait.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyProfile] = None,
+        tokens_per_second: float = 50.0,
+        completion_tokens: int = 60,
+        rate_limit_per_minute: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        canned: Union[Mapping[str, str], Callable[[str], str], None] = None,
+        seed: int = 0,
+        time_scale: float = 1.0,
+        model: str = "simulated",
+    ):
+        self.latency = latency or LatencyProfile()
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.rate_limit_per_minute = rate_limit_per_minute
+        self.max_concurrent = max_concurrent
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.canned = canned
+        self.seed = seed
+        self.time_scale = time_scale
+        self.model = model
+
+        self.requests = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._calls_per_prompt: dict[int, int] = {}
+        self._recent_requests: deque[float] = deque()
+        self._started: Optional[float] = None
+        self._last_change = 0.0
+        self._in_flight_seconds = 0.0
+
+    def _rng(self, prompt: str) -> random.Random:
+        h = prompt_hash(prompt)
+        attempt = self._calls_per_prompt.get(h, 0)
+        self._calls_per_prompt[h] = attempt + 1
+        return random.Random(f"{self.seed}:{h}:{attempt}")
+
+    def _set_in_flight(self, delta: int) -> None:
+        now = time.monotonic()
+        if self._started is None:
+            self._started = self._last_change = now
+        self._in_flight_seconds += self._in_flight * (now - self._last_change)
+        self._last_change = now
+        self._in_flight += delta
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+
+    def _admit(self) -> None:
+        self.requests += 1
+        now = time.monotonic()
+        if self.rate_limit_per_minute is not None:
+            while self._recent_requests and self._recent_requests[0] < now - 60:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.rate_limit_per_minute:
+                self.rate_limited += 1
+                raise SimulatedRateLimitError("Simulated rate limit exceeded")
+            self._recent_requests.append(now)
+        if self.max_concurrent is not None and self._in_flight >= self.max_concurrent:
+            self.rate_limited += 1
+            raise SimulatedRateLimitError("Simulated server overloaded")
+
+    def completion_for(self, prompt: str, max_tokens: int) -> str:
+        if callable(self.canned):
+            return self.canned(prompt)
+        if self.canned is not None and prompt in self.canned:
+            return self.canned[prompt]
+        return canned_words(prompt, min(self.completion_tokens, max_tokens))
+
+    async def _respond(self, prompt: str, output_tokens: int) -> None:
+        rng = self._rng(prompt)
+        self._admit()
+        self._set_in_flight(1)
+        try:
+            wait = self.latency.sample(rng)
+            failure = rng.random()
+            if failure < self.timeout_rate:
+                await anyio.sleep(self.latency.max_latency * self.time_scale)
+                self.timeouts += 1
+                raise TimeoutError("Simulated timeout")
+            if failure < self.timeout_rate + self.error_rate:
+                await anyio.sleep(wait * self.time_scale)
+                self.errors += 1
+                raise SimulatedServerError("Simulated server error")
+            wait += output_tokens / self.tokens_per_second
+            await anyio.sleep(wait * self.time_scale)
+            self.completed += 1
+        finally:
+            self._set_in_flight(-1)
+
+    async def complete(
+        self,
+        *,
+        prompt: str,
+        stop: Stop = None,
+        verbose: bool = False,
+        default: str = "",
+        max_tokens: int = 256,
+        **kwargs,
+    ) -> str:
+        completion = self.completion_for(prompt, max_tokens)
+        await self._respond(prompt, len(completion.split()))
+        return completion
+
+    async def relevance(
+        self,
+        *,
+        context: str,
+        question: str,
+        verbose: bool = False,
+        default: Optional[float] = None,
+    ) -> float:
+        prompt = context + question
+        await self._respond(prompt, 1)
+        return prompt_hash(prompt) % 1000 / 1000
+
+    async def classify(
+        self,
+        *,
+        prompt: str,
+        choices: tuple[str, ...],
+        default: Optional[str] = None,
+        verbose: bool = False,
+    ) -> tuple[dict[str, float], Optional[str]]:
+        await self._respond(prompt, 1)
+        choice = choices[prompt_hash(prompt) % len(choices)]
+        return {c: float(c == choice) for c in choices}, None
+
+    def stats(self) -> dict[str, float]:
+        elapsed = (self._last_change - self._started) if self._started else 0.0
+        return {
+            "requests": self.requests,
+            "completed": self.completed,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "max_in_flight": self.max_in_flight,
+            "mean_in_flight": self._in_flight_seconds / elapsed if elapsed else 0.0,
+        }
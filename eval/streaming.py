@@ -0,0 +1,62 @@
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+
+import anyio
+import pandas as pd
+
+Record = tuple[Hashable, dict[str, Any]]
+
+
+def iter_df_records(df: pd.DataFrame) -> Iterator[Record]:
+    """
+    Yield (index, row dict) pairs without building a pd.Series per row.
+    """
+    columns = list(df.columns)
+    for index, values in zip(df.index, df.itertuples(index=False, name=None)):
+        yield index, dict(zip(columns, values))
+
+
+def iter_csv_records(path: str, chunksize: int = 1000) -> Iterator[Record]:
+    """
+    Read `path` `chunksize` rows at a time and yield (index, row dict) pairs.
+    The index continues across chunks, so it matches pd.read_csv(path).index.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        yield from iter_df_records(chunk)
+
+
+async def map_records_bounded(
+    records: Iterable[Record],
+    fn: Callable[[Record], Awaitable[None]],
+    max_concurrency: int,
+    max_buffered: int | None = None,
+) -> None:
+    """
+    Run `fn` over `records` with `max_concurrency` workers. Records are pulled
+    from the iterable only as workers free up (plus up to `max_buffered`
+    waiting in the queue), so memory stays bounded by the in-flight rows and
+    the first results arrive before the input has been read to the end.
+    """
+    send_stream, receive_stream = anyio.create_memory_object_stream(
+        max_buffered if max_buffered is not None else max_concurrency
+    )
+
+    async def produce():
+        async with send_stream:
+            for record in records:
+                await send_stream.send(record)
+
+    async def work(receive_stream):
+        async with receive_stream:
+            async for record in receive_stream:
+                await fn(record)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(produce)
+        async with receive_stream:
+            for _ in range(max_concurrency):
+                tg.start_soon(work, receive_stream.clone())
@@ -0,0 +1,232 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict
+from dataclasses import dataclass
+from typing import Any
+from typing import Optional
+
+from ice.agents.base import Agent
+from ice.contrib.ought_shared.completion_cache import agent_model
+from ice.contrib.ought_shared.eval.agent_wrappers import wrap_agents
+from ice.contrib.ought_shared.eval.run_metrics import stage
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    get_tokenizer,
+)
+
+# USD per 1k tokens, prompt and completion alike
+MODEL_PRICES = {
+    "text-davinci-002": 0.02,
+    "text-davinci-003": 0.02,
+    "text-curie-001": 0.002,
+    "text-babbage-001": 0.0005,
+    "text-ada-001": 0.0004,
+}
+
+LABELS = ("recipe", "technique", "row")
+
+
+class TokenBudgetExceeded(Exception):
+    pass
+
+
+@dataclass
+class TokenUsage:
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, other: "TokenUsage") -> None:
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+
+
+_usage_labels: ContextVar[dict[str, str]] = ContextVar("usage_labels", default={})
+
+
+@contextmanager
+def usage_labels(**labels: str) -> Iterator[None]:
+    """
+    Attribute LM calls in the block to these labels (recipe, technique and
+    row), on top of the labels already set. technique defaults to recipe.
+    """
+    token = _usage_labels.set({**_usage_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _usage_labels.reset(token)
+
+
+def count_tokens(text: str) -> int:
+    with stage("tokenize"):
+        return len(get_tokenizer().tokenize(text))
+
+
+class TokenMeter:
+    """
+    Records prompt and completion tokens of every LM call made through
+    recipe.agent() inside `activate()`, per (recipe, technique, row).
+
+    With a `budget` (in tokens), a call that could take the total over it
+    (its prompt plus max_tokens, on top of what's used and reserved by
+    calls in flight) raises TokenBudgetExceeded instead of being sent, and
+    `can_dispatch` tells runners to stop starting rows once the average
+    row so far wouldn't fit.
+    """
+
+    def __init__(
+        self, budget: Optional[int] = None, price_per_1k: Optional[float] = None
+    ):
+        self.budget = budget
+        self.price_per_1k = price_per_1k
+        self.usage: dict[tuple[str, str, str], TokenUsage] = {}
+        self.reserved = 0
+        self.rows_done = 0
+        self.rows_in_flight = 0
+        self.rows_skipped = 0
+        self.models: set[str] = set()
+        self.total = TokenUsage()
+
+    @property
+    def used(self) -> int:
+        return self.total.total_tokens
+
+    def reserve(self, tokens: int) -> None:
+        if self.budget is None:
+            self.reserved += tokens
+            return
+        if self.used + self.reserved + tokens > self.budget:
+            raise TokenBudgetExceeded(
+                f"A call of up to {tokens} tokens would exceed the budget of "
+                f"{self.budget} ({self.used} used, {self.reserved} reserved)"
+            )
+        self.reserved += tokens
+
+    def release(self, tokens: int) -> None:
+        self.reserved -= tokens
+
+    def record(self, prompt_tokens: int, completion_tokens: int) -> None:
+        labels = _usage_labels.get()
+        recipe_name = labels.get("recipe", "")
+        key = (
+            recipe_name,
+            labels.get("technique", recipe_name),
+            labels.get("row", ""),
+        )
+        if key not in self.usage:
+            self.usage[key] = TokenUsage()
+        usage = TokenUsage(1, prompt_tokens, completion_tokens)
+        self.usage[key].add(usage)
+        self.total.add(usage)
+
+    def can_dispatch(self) -> bool:
+        if self.budget is None:
+            return True
+        per_row = self.used / self.rows_done if self.rows_done else 0
+        projected = self.used + self.reserved + per_row * (self.rows_in_flight + 1)
+        return projected <= self.budget
+
+    @contextmanager
+    def track_row(self, **labels: str) -> Iterator[None]:
+        self.rows_in_flight += 1
+        try:
+            with usage_labels(**labels):
+                yield
+            self.rows_done += 1
+        finally:
+            self.rows_in_flight -= 1
+
+    @contextmanager
+    def activate(self) -> Iterator["TokenMeter"]:
+        with wrap_agents(lambda agent: MeteredAgent(agent, self)):
+            yield self
+
+    def usage_by(self, *labels: str) -> dict[tuple[str, ...], TokenUsage]:
+        indices = [LABELS.index(label) for label in labels]
+        groups: dict[tuple[str, ...], TokenUsage] = {}
+        for key, usage in self.usage.items():
+            groups.setdefault(tuple(key[i] for i in indices), TokenUsage()).add(usage)
+        return groups
+
+    def cost(self, usage: TokenUsage) -> Optional[float]:
+        price = self.price_per_1k
+        if price is None and len(self.models) == 1:
+            price = MODEL_PRICES.get(next(iter(self.models)))
+        return None if price is None else usage.total_tokens / 1000 * price
+
+    def summary(self) -> dict[str, Any]:
+        def grouped(label: str) -> dict[str, dict[str, Any]]:
+            return {
+                name: {**asdict(usage), "cost": self.cost(usage)}
+                for (name,), usage in self.usage_by(label).items()
+            }
+
+        total = self.total
+        return {
+            **asdict(total),
+            "total_tokens": total.total_tokens,
+            "cost": self.cost(total),
+            "budget": self.budget,
+            "rows_done": self.rows_done,
+            "rows_skipped": self.rows_skipped,
+            "models": sorted(self.models),
+            "by_recipe": grouped("recipe"),
+            "by_technique": grouped("technique"),
+        }
+
+
+class MeteredAgent(Agent):
+    """
+    Records the wrapped agent's token usage in `meter`.
+    """
+
+    def __init__(self, agent: Agent, meter: TokenMeter):
+        self.agent = agent
+        self.meter = meter
+        self.model = agent_model(agent)
+
+    async def _metered(self, call, text: str, max_tokens: int, kwargs: dict):
+        prompt_tokens = count_tokens(text)
+        self.meter.reserve(prompt_tokens + max_tokens)
+        self.meter.models.add(self.model)
+        try:
+            result = await call(**kwargs)
+        finally:
+            self.meter.release(prompt_tokens + max_tokens)
+        # classify, relevance and predict score a single token
+        completion_tokens = (
+            count_tokens(result) if isinstance(result, str) else max_tokens
+        )
+        self.meter.record(prompt_tokens, completion_tokens)
+        return result
+
+    async def complete(self, *, prompt: str, max_tokens: int = 256, **kwargs) -> str:
+        return await self._metered(
+            self.agent.complete,
+            prompt,
+            max_tokens,
+            dict(prompt=prompt, max_tokens=max_tokens, **kwargs),
+        )
+
+    async def classify(self, *, prompt: str, **kwargs):
+        return await self._metered(
+            self.agent.classify, prompt, 1, dict(prompt=prompt, **kwargs)
+        )
+
+    async def relevance(self, *, context: str, question: str, **kwargs) -> float:
+        return await self._metered(
+            self.agent.relevance,
+            context + question,
+            1,
+            dict(context=context, question=question, **kwargs),
+        )
+
+    async def predict(self, *, context: str, **kwargs) -> dict[str, float]:
+        return await self._metered(
+            self.agent.predict, context, 1, dict(context=context, **kwargs)
+        )
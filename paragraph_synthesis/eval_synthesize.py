@@ -1,36 +1,48 @@
-import pandas as pd
+import json
 
 from ice.recipe import Recipe
 from ice.recipe import recipe
-from ice.contrib.ought_shared.eval.eval_vs_gs import run_over_gs
+from ice.contrib.ought_shared.eval.eval_vs_gs import run_recipes_over_gs
+from ice.contrib.ought_shared.eval.output_formats import check_output_format
+from ice.contrib.ought_shared.eval.output_formats import write_results
+from ice.contrib.ought_shared.paragraph_synthesis.gold_standard import GS_FILENAME
+from ice.contrib.ought_shared.paragraph_synthesis.gold_standard import load_gold_standard
+from ice.contrib.ought_shared.paragraph_synthesis.synthesize import synthesize
+from ice.contrib.ought_shared.paragraph_synthesis.synthesize_chain_of_thought import (
+    synthesize_chain_of_thought,
+)
 from ice.contrib.ought_shared.paragraph_synthesis.synthesize_compositional import (
     synthesize_compositional,
 )
 from ice.contrib.ought_shared.utils import reorder_columns
-from ice.recipes.abstract_qa import Abstract
 from pathlib import Path
-import json
 
-RECIPE_TO_RUN = synthesize_compositional
-GS_FILENAME = "ice/contrib/ought_shared/paragraph_synthesis/paragraph_synthesis_gs.csv"
+RECIPES_TO_RUN = [
+    synthesize,
+    synthesize_chain_of_thought,
+    synthesize_compositional,
+]
 SPLITS = ["validation"]
 
 DATA_PATH = Path("ice/contrib/ought_shared/paragraph_synthesis/data/")
 
-async def eval_synthesize():
-    gs_df = pd.read_csv(GS_FILENAME)
+async def eval_synthesize(output_format: str = "csv", token_budget: int = 0):
+    """
+    --token-budget: stop starting rows once this many prompt + completion
+    tokens would be exceeded (0 for no budget).
+    """
+    check_output_format(output_format)
+    gs_df = load_gold_standard(GS_FILENAME)
     gs_df = gs_df[gs_df["is_gs"] == True].reset_index()
-    gs_df["abstracts"] = gs_df["papers"].apply(lambda papers: [
-        Abstract(
-            title=paper["title"],
-            authors=paper["authors"],
-            year=paper["year"],
-            text=paper["abstract"],
-        )
-        for paper in json.loads(papers)
-    ])
 
-    answers_df = await run_over_gs(RECIPE_TO_RUN, gs_df, SPLITS)
+    answers_df = await run_recipes_over_gs(
+        RECIPES_TO_RUN, gs_df, SPLITS, token_budget=token_budget or None
+    )
+    run_metrics = {
+        **answers_df.attrs["run_metrics"],
+        "coalescing": answers_df.attrs["coalescing"],
+    }
+    token_usage = answers_df.attrs["token_usage"]
     answers_df["question"] = answers_df["document_id"]
     gs_df.columns = [f"{column}_gs" for column in gs_df.columns]
     gs_df["question"] = gs_df["question_gs"]
@@ -74,7 +86,16 @@ async def eval_synthesize():
 
     DATA_PATH.mkdir(parents=True, exist_ok=True)
 
-    merged_df.to_csv(DATA_PATH / f"{RECIPE_TO_RUN.__name__}_eval.csv", index=False)
+    recipe_names = "_".join(recipe_to_run.__name__ for recipe_to_run in RECIPES_TO_RUN)
+    output = write_results(
+        merged_df, DATA_PATH / f"{recipe_names}_eval", output_format, index=False
+    )
+    output.with_name(f"{output.name}.metrics.json").write_text(
+        json.dumps(run_metrics, indent=2)
+    )
+    output.with_name(f"{output.name}.usage.json").write_text(
+        json.dumps(token_usage, indent=2)
+    )
 
     return merged_df
 
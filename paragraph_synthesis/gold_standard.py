@@ -0,0 +1,75 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+
+from pathlib import Path
+from typing import Optional
+from typing import Union
+
+import pandas as pd
+
+from ice.recipes.abstract_qa import Abstract
+from ice.settings import CACHE_DIR
+
+GS_FILENAME = "ice/contrib/ought_shared/paragraph_synthesis/paragraph_synthesis_gs.csv"
+
+# Bump when parse_gold_standard changes, so stale cached copies are rebuilt
+GS_CACHE_VERSION = 1
+
+GS_CACHE_DIR = CACHE_DIR / "paragraph_synthesis_gs"
+
+
+def parse_abstracts(papers: str) -> list[Abstract]:
+    return [
+        Abstract(
+            title=paper["title"],
+            authors=paper["authors"],
+            year=paper["year"],
+            text=paper["abstract"],
+        )
+        for paper in json.loads(papers)
+    ]
+
+
+def parse_gold_standard(csv_bytes: bytes) -> pd.DataFrame:
+    gs_df = pd.read_csv(io.BytesIO(csv_bytes))
+    gs_df["abstracts"] = [parse_abstracts(papers) for papers in gs_df["papers"]]
+    return gs_df
+
+
+def cache_path(path: Path, csv_bytes: bytes, cache_dir: Path) -> Path:
+    digest = hashlib.sha256(csv_bytes).hexdigest()[:16]
+    return cache_dir / f"{path.stem}-v{GS_CACHE_VERSION}-{digest}.pkl"
+
+
+def load_gold_standard(
+    path: Union[str, Path] = GS_FILENAME, cache_dir: Optional[Path] = None
+) -> pd.DataFrame:
+    """
+    The gold standard CSV with an "abstracts" column of parsed Abstracts.
+    The parsed DataFrame is pickled under a name containing the CSV's content
+    hash, so later runs load it directly until the CSV changes.
+    """
+    path = Path(path)
+    cache_dir = cache_dir or GS_CACHE_DIR
+    csv_bytes = path.read_bytes()
+    cached = cache_path(path, csv_bytes, cache_dir)
+    if cached.exists():
+        try:
+            with open(cached, "rb") as f:
+                return pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            pass
+
+    gs_df = parse_gold_standard(csv_bytes)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob(f"{path.stem}-*.pkl"):
+        stale.unlink(missing_ok=True)
+    tmp_path = cached.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(gs_df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cached)
+    return gs_df
@@ -0,0 +1,85 @@
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import Any
+
+
+class PromptBudget:
+    """
+    Fit a few-shot prompt of the form `prefix, *shots, suffix` (joined by `sep`)
+    into `max_tokens`, dropping shots from the end until at least
+    `min_completion_tokens` are left for the completion.
+
+    The static head of the prompt (prefix plus the first n shots) is tokenized
+    at most once per n and memoized, so each request only tokenizes its suffix.
+    The prompt length is then estimated as head + suffix; BPE merges across the
+    head/suffix boundary can shift the true count by a token or two, so the
+    assembled prompt is only tokenized when the estimate is within
+    `exact_margin` tokens of the limit.
+
+    The memo is dropped whenever `memo_key()` returns a different object, so
+    passing the current tokenizer keeps it valid across tokenizer switches.
+    """
+
+    def __init__(
+        self,
+        *,
+        prefix: str,
+        shots: Sequence[str],
+        sep: str,
+        max_tokens: int,
+        min_completion_tokens: int,
+        count_tokens: Callable[[str], int],
+        exact_margin: int = 16,
+        memo_key: Callable[[], Any] = lambda: None,
+    ):
+        self.prefix = prefix
+        self.shots = list(shots)
+        self.sep = sep
+        self.max_tokens = max_tokens
+        self.min_completion_tokens = min_completion_tokens
+        self.count_tokens = count_tokens
+        self.exact_margin = exact_margin
+        self.memo_key = memo_key
+        self._memo_owner: Any = None
+        self._head_tokens: dict[int, int] = {}
+
+    def head(self, number_of_shots: int) -> str:
+        return self.sep.join([self.prefix, *self.shots[:number_of_shots]]) + self.sep
+
+    def head_tokens(self, number_of_shots: int) -> int:
+        owner = self.memo_key()
+        if owner is not self._memo_owner:
+            self._memo_owner = owner
+            self._head_tokens = {}
+        if number_of_shots not in self._head_tokens:
+            self._head_tokens[number_of_shots] = self.count_tokens(
+                self.head(number_of_shots)
+            )
+        return self._head_tokens[number_of_shots]
+
+    def build(self, suffix: str, number_of_shots: int) -> str:
+        return self.head(number_of_shots) + suffix
+
+    def fit(self, suffix: str) -> tuple[str, int]:
+        """
+        Return the prompt with as many shots as fit, and the number of tokens
+        left for the completion.
+        """
+        limit = self.max_tokens - self.min_completion_tokens
+        suffix_tokens = self.count_tokens(suffix)
+
+        number_of_shots = len(self.shots)
+        while True:
+            prompt_tokens = self.head_tokens(number_of_shots) + suffix_tokens
+            if prompt_tokens > limit + self.exact_margin and number_of_shots > 0:
+                number_of_shots -= 1
+                continue
+
+            prompt = self.build(suffix, number_of_shots)
+            if prompt_tokens >= limit - self.exact_margin:
+                prompt_tokens = self.count_tokens(prompt)
+                if prompt_tokens > limit and number_of_shots > 0:
+                    number_of_shots -= 1
+                    continue
+
+            return prompt, self.max_tokens - prompt_tokens
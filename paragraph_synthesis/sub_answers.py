@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+from typing import Optional
+
+from ice.contrib.ought_shared.completion_cache import DiskCache
+from ice.contrib.ought_shared.completion_cache import MISSING
+from ice.contrib.ought_shared.completion_cache import cache_bypassed
+from ice.contrib.ought_shared.singleflight import SingleFlight
+from ice.recipes.abstract_qa import Abstract
+from ice.settings import CACHE_DIR
+
+
+def abstract_hash(abstract: Abstract) -> str:
+    return hashlib.sha256(
+        json.dumps(asdict(abstract), sort_keys=True).encode()
+    ).hexdigest()
+
+
+class SubAnswerStore:
+    """
+    Persistent memo of per-abstract answers, keyed by (question, abstract
+    content, recipe version). Concurrent get_or_compute calls for the same key
+    wait for a single computation instead of each running it.
+    """
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+        self.flight = SingleFlight()
+
+    @staticmethod
+    def key(question: str, abstract: Abstract, version: str) -> str:
+        return hashlib.sha256(
+            json.dumps([question, abstract_hash(abstract), version]).encode()
+        ).hexdigest()
+
+    async def get(self, key: str) -> Any:
+        if cache_bypassed():
+            return MISSING
+        return await self.cache.get_async(key)
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        value = await self.get(key)
+        if value is not MISSING:
+            return value
+
+        async def compute_and_store() -> Any:
+            value = await compute()
+            await self.cache.set_async(key, value)
+            return value
+
+        return await self.flight.do(key, compute_and_store)
+
+
+_sub_answer_store: Optional[SubAnswerStore] = None
+
+
+def sub_answer_store() -> SubAnswerStore:
+    global _sub_answer_store
+    if _sub_answer_store is None:
+        _sub_answer_store = SubAnswerStore(
+            DiskCache(CACHE_DIR / "ought_shared_sub_answers.sqlite")
+        )
+    return _sub_answer_store
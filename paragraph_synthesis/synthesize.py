@@ -1,24 +1,34 @@
 import json
 
-from transformers import GPT2TokenizerFast
-
 from ice.recipe import recipe
 from ice.recipes.abstract_qa import Abstract
 from ice.recipes.abstract_qa import DEFAULT_ABSTRACTS
-
-
-def make_gpt2_tokenizer() -> GPT2TokenizerFast:
-    return GPT2TokenizerFast.from_pretrained("gpt2")
-
-
-gpt2_tokenizer = make_gpt2_tokenizer()
+from ice.contrib.ought_shared.completion_cache import cached_complete
+from ice.contrib.ought_shared.eval.run_metrics import stage
+from ice.contrib.ought_shared.paragraph_synthesis.prompt_budget import PromptBudget
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    get_tokenizer,
+)
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    make_gpt2_tokenizer,
+)
+
+
+def __getattr__(name: str):
+    # gpt2_tokenizer used to be loaded on import; now it's loaded on first use
+    if name == "gpt2_tokenizer":
+        global gpt2_tokenizer
+        gpt2_tokenizer = make_gpt2_tokenizer()
+        return gpt2_tokenizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def num_tokens(text: str) -> int:
     """
-    Return how many tokens are in 'text'.
+    Return how many tokens are in 'text'. The tokenizer is loaded on first use.
     """
-    return len(gpt2_tokenizer.tokenize(text))
+    with stage("tokenize"):
+        return len(get_tokenizer().tokenize(text))
 
 
 PREFIX = """In this section, we will demonstrate how to write an ideal answer for a question using academic literature. When answering questions using academic literature you MUST use references.
@@ -82,6 +92,16 @@ PAPER_FORMAT = """Paper: {title}
 Reference: {reference}
 Excerpt: {abstract}"""
 
+prompt_budget = PromptBudget(
+    prefix=PREFIX,
+    shots=SHOTS,
+    sep="\n\n###\n\n",
+    max_tokens=MAX_TOKENS,
+    min_completion_tokens=MIN_COMPLETION_TOKENS,
+    count_tokens=num_tokens,
+    memo_key=get_tokenizer,
+)
+
 
 def _get_reference(authors: list[str], year: int | None) -> str:
     if len(authors) == 0:
@@ -95,36 +115,26 @@ def _get_reference(authors: list[str], year: int | None) -> str:
 
 
 async def synthesize(question: str, abstracts: list[Abstract], **kwargs) -> str:
-
-    papers_str = "\n\n".join(
-        [
-            PAPER_FORMAT.format(
-                title=abstract.title,
-                reference=_get_reference(abstract.authors, abstract.year),
-                abstract=abstract.text,
-            )
-            for abstract in abstracts
-        ]
-    )
-
-    suffix = PROMPT_FORMAT.format(
-        question=question,
-        papers_str=papers_str,
-    )
-
-    sep = "\n\n###\n\n"
-
-    prompt = PREFIX + sep + sep.join(SHOTS) + sep + suffix
-    number_of_shots = len(SHOTS)
-    while (
-        num_tokens(prompt) > MAX_TOKENS - MIN_COMPLETION_TOKENS and number_of_shots > 0
-    ):
-        number_of_shots -= 1
-        prompt = PREFIX + sep + sep.join(SHOTS[:number_of_shots]) + sep + suffix
-
-    remaining_tokens = MAX_TOKENS - num_tokens(prompt)
-
-    completion = await recipe.agent().complete(
+    with stage("build_prompt"):
+        papers_str = "\n\n".join(
+            [
+                PAPER_FORMAT.format(
+                    title=abstract.title,
+                    reference=_get_reference(abstract.authors, abstract.year),
+                    abstract=abstract.text,
+                )
+                for abstract in abstracts
+            ]
+        )
+
+        suffix = PROMPT_FORMAT.format(
+            question=question,
+            papers_str=papers_str,
+        )
+
+        prompt, remaining_tokens = prompt_budget.fit(suffix)
+
+    completion = await cached_complete(
         prompt=prompt, max_tokens=remaining_tokens, stop="<|endoftext|>"
     )
 
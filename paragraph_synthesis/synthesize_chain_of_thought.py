@@ -1,12 +1,14 @@
 from functools import partial
 
-import transformers
-
-from ice.recipe import recipe
+from ice.contrib.ought_shared.completion_cache import cached_complete
+from ice.contrib.ought_shared.eval.run_metrics import stage
 from ice.contrib.ought_shared.paragraph_synthesis.synthesize import _get_reference
 from ice.contrib.ought_shared.paragraph_synthesis.synthesize import Abstract
 from ice.contrib.ought_shared.paragraph_synthesis.synthesize import num_tokens
-from ice.contrib.ought_shared.paragraph_synthesis.synthesize_ft import n_tokens
+from ice.contrib.ought_shared.paragraph_synthesis.prompt_budget import PromptBudget
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    get_tokenizer,
+)
 
 PROMPT = """An ideal answer gives references to the academic literature. Example: "To our knowledge, the only freely and publicly available dense autoregressive language models larger than GPT2 are GPT-Neo (Black et al., 2021), GPT-J-6B (Wang and Komatsuzaki, 2021), Megatron-11B, Pangu-13B (Zeng et al., 2021), and the recently released FairSeq models (Artetxe et al., 2021)."
 
@@ -70,20 +72,28 @@ Here are the relevant papers, and excerpts from those papers:\n\n"""
 
 SUFFIX = "\n\nLet's think about how each paper answers the overall question:"
 
+prompt_budget = PromptBudget(
+    prefix=PREFIX,
+    shots=[EXTRA_SHOT],
+    sep="\n\n",
+    max_tokens=4000,
+    min_completion_tokens=300,
+    count_tokens=num_tokens,
+    memo_key=get_tokenizer,
+)
+
 
 def _get_prompt(question, titles, citations, abstracts):
-    paper_prompt = (
-        PREFIX.format(question=question)
-        + "\n\n".join(
-            PAPER_FORMAT.format(title=title, citation=citation, abstract=abstract)
-            for title, citation, abstract in zip(titles, citations, abstracts)
+    with stage("build_prompt"):
+        paper_prompt = (
+            PREFIX.format(question=question)
+            + "\n\n".join(
+                PAPER_FORMAT.format(title=title, citation=citation, abstract=abstract)
+                for title, citation, abstract in zip(titles, citations, abstracts)
+            )
+            + SUFFIX
         )
-        + SUFFIX
-    )
-    prompt = PREFIX + "\n\n" + EXTRA_SHOT + "\n\n" + paper_prompt
-    if n_tokens(prompt) > 3700:  # 300 tokens for the completion
-        prompt = PREFIX + "\n\n" + paper_prompt
-    return prompt, 4000 - n_tokens(prompt)
+        return prompt_budget.fit(paper_prompt)
 
 
 async def synthesize_chain_of_thought(question: str, abstracts: list[Abstract], **kwargs) -> str:
@@ -96,7 +106,7 @@ async def synthesize_chain_of_thought(question: str, abstracts: list[Abstract],
         ],
     )
 
-    completion = await recipe.agent().complete(
+    completion = await cached_complete(
         prompt=prompt,
         max_tokens=max_tokens,
         logit_bias={"50256": -100},
@@ -1,20 +1,48 @@
 from functools import partial
 
+from ice.contrib.ought_shared.eval.concurrency import AdaptiveConcurrency
+from ice.contrib.ought_shared.eval.concurrency import map_async_adaptive
+from ice.contrib.ought_shared.completion_cache import MISSING
+from ice.contrib.ought_shared.completion_cache import agent_model
+from ice.contrib.ought_shared.eval.token_meter import usage_labels
+from ice.contrib.ought_shared.paragraph_synthesis.sub_answers import sub_answer_store
 from ice.recipe import recipe
 from ice.recipes.abstract_qa import Abstract
 from ice.recipes.abstract_qa import abstract_qa
 from ice.recipes.abstract_qa import DEFAULT_ABSTRACTS
 from ice.recipes.combine_abstract_answers import combine_abstract_answers
-from ice.utils import map_async
+
+# Shared across calls so the limit adapts over a whole eval run, not per question.
+# Overloaded calls aren't retried here: the row is retried by the runner, and
+# the answers that did finish are reused from the sub-answer store.
+abstract_qa_concurrency = AdaptiveConcurrency(max_retries=0)
+
+# Bump when abstract_qa's prompt changes, to stop reusing memoized answers
+ABSTRACT_QA_VERSION = "1"
 
 
 async def synthesize_compositional(question: str, abstracts: list[Abstract], **kwargs) -> str:
-    answers = await map_async(
-        abstracts, lambda abstract: abstract_qa(abstract=abstract, question=question)
-    )
-    answer = await combine_abstract_answers(
-        question=question, abstracts=abstracts, answers=answers
-    )
+    store = sub_answer_store()
+    version = f"{ABSTRACT_QA_VERSION}:{agent_model(recipe.agent())}"
+    keys = [store.key(question, abstract, version) for abstract in abstracts]
+    answers = [await store.get(key) for key in keys]
+
+    misses = [i for i, answer in enumerate(answers) if answer is MISSING]
+    with usage_labels(technique="abstract_qa"):
+        computed = await map_async_adaptive(
+            misses,
+            lambda i: store.get_or_compute(
+                keys[i], lambda: abstract_qa(abstract=abstracts[i], question=question)
+            ),
+            abstract_qa_concurrency,
+        )
+    for i, answer in zip(misses, computed):
+        answers[i] = answer
+
+    with usage_labels(technique="combine_abstract_answers"):
+        answer = await combine_abstract_answers(
+            question=question, abstracts=abstracts, answers=answers
+        )
     return answer
 
 
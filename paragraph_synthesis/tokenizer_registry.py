@@ -0,0 +1,92 @@
+import math
+import os
+import re
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Optional
+from typing import Protocol
+
+
+class Tokenizer(Protocol):
+    def tokenize(self, text: str) -> list[str]:
+        ...
+
+
+def make_gpt2_tokenizer() -> Tokenizer:
+    from transformers import GPT2TokenizerFast
+
+    return GPT2TokenizerFast.from_pretrained("gpt2")
+
+
+def make_local_gpt2_tokenizer() -> Tokenizer:
+    """
+    Load GPT-2 from a local directory (GPT2_TOKENIZER_PATH) containing either
+    tokenizer.json or vocab.json + merges.txt, without touching the network.
+    """
+    from transformers import GPT2TokenizerFast
+
+    path = Path(os.environ["GPT2_TOKENIZER_PATH"])
+    if (path / "tokenizer.json").exists():
+        return GPT2TokenizerFast(tokenizer_file=str(path / "tokenizer.json"))
+    return GPT2TokenizerFast(
+        vocab_file=str(path / "vocab.json"), merges_file=str(path / "merges.txt")
+    )
+
+
+class ApproximateTokenizer:
+    """
+    Pure-Python stand-in for GPT-2: splits text the way GPT-2 pre-tokenizes it
+    and then cuts long words into chunks of `chars_per_token` characters.
+    Counts are close to GPT-2's for English prose, but not exact.
+    """
+
+    pattern = re.compile(
+        r"""'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d+| ?[^\s\w]+|\s+(?!\S)|\s+"""
+    )
+
+    def __init__(self, chars_per_token: int = 8):
+        self.chars_per_token = chars_per_token
+
+    def tokenize(self, text: str) -> list[str]:
+        tokens = []
+        for piece in self.pattern.findall(text):
+            n = max(1, math.ceil(len(piece.lstrip(" ")) / self.chars_per_token))
+            step = math.ceil(len(piece) / n)
+            tokens.extend(piece[i : i + step] for i in range(0, len(piece), step))
+        return tokens
+
+
+TOKENIZERS: dict[str, Callable[[], Tokenizer]] = {
+    "gpt2": make_gpt2_tokenizer,
+    "gpt2-local": make_local_gpt2_tokenizer,
+    "approximate": ApproximateTokenizer,
+}
+
+_tokenizer_name: str = os.environ.get("ICE_TOKENIZER", "gpt2")
+_tokenizer: Optional[Tokenizer] = None
+
+
+def register_tokenizer(name: str, factory: Callable[[], Tokenizer]) -> None:
+    TOKENIZERS[name] = factory
+
+
+def use_tokenizer(name: str) -> None:
+    """
+    Select the tokenizer that get_tokenizer() loads. Takes effect on the next
+    call, so it can be used before or after the first load.
+    """
+    global _tokenizer_name, _tokenizer
+    if name not in TOKENIZERS:
+        raise ValueError(
+            f"Unknown tokenizer {name!r}, expected one of {sorted(TOKENIZERS)}"
+        )
+    _tokenizer_name = name
+    _tokenizer = None
+
+
+def get_tokenizer() -> Tokenizer:
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = TOKENIZERS[_tokenizer_name]()
+    return _tokenizer
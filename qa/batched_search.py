@@ -0,0 +1,187 @@
+import re
+
+from collections.abc import Mapping
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Optional
+from typing import Protocol
+
+from ice.agents.base import Agent
+from ice.contrib.ought_shared.completion_cache import cached_complete
+from ice.contrib.ought_shared.qa.qa_column_config import LMSearchStrategy
+from ice.contrib.ought_shared.qa.qa_column_config import QAColumnConfig
+from ice.contrib.ought_shared.qa.section_index import IndexedParagraph
+from ice.contrib.ought_shared.qa.section_index import SectionIndex
+from ice.recipe import recipe
+from ice.utils import map_async
+
+
+class ParagraphScorer(Protocol):
+    async def score(self, paragraph: str, questions: Sequence[str]) -> list[float]:
+        """
+        Relevance of `paragraph` to each question, between 0 and 1.
+        """
+        ...
+
+
+BATCH_PROMPT = """Here is a paragraph from a research paper:
+
+"{paragraph}"
+
+For each question below, rate from 0 to 10 how much the paragraph helps answer it.
+
+{questions}
+
+Ratings, one per line as "<question number>: <rating>":
+1:"""
+
+# [ \t] rather than \s, so a line without a rating doesn't take the next one's
+RATING_LINE = re.compile(r"^[ \t]*(\d+)[ \t]*:[ \t]*(\d+(?:\.\d+)?)", re.MULTILINE)
+
+
+def unit_interval(score: float) -> float:
+    # agent.relevance is meant to be a probability, but not every agent's is
+    # (e.g. reranker scores); clamped so it ranks alongside parsed ratings
+    return min(max(float(score), 0.0), 1.0)
+
+
+@dataclass
+class AgentBatchScorer:
+    """
+    Rates a paragraph against all questions with one completion. Questions
+    the completion doesn't rate fall back to agent.relevance, one concurrent
+    call each. Both are scored between 0 and 1.
+    """
+
+    agent: Optional[Agent] = None
+    max_rating: float = 10
+
+    def prompt(self, paragraph: str, questions: Sequence[str]) -> str:
+        numbered = "\n".join(
+            f"{i + 1}. {question.strip()}" for i, question in enumerate(questions)
+        )
+        return BATCH_PROMPT.format(paragraph=paragraph, questions=numbered)
+
+    def parse(self, completion: str, n_questions: int) -> dict[int, float]:
+        """
+        Ratings by question index, scaled from 0-max_rating to 0-1.
+        """
+        ratings = {}
+        for number, rating in RATING_LINE.findall("1:" + completion):
+            i = int(number) - 1
+            if 0 <= i < n_questions and i not in ratings:
+                ratings[i] = min(float(rating), self.max_rating) / self.max_rating
+        return ratings
+
+    async def score(self, paragraph: str, questions: Sequence[str]) -> list[float]:
+        agent = self.agent or recipe.agent()
+        completion = await cached_complete(
+            prompt=self.prompt(paragraph, questions),
+            max_tokens=8 * len(questions) + 16,
+            agent=agent,
+        )
+        ratings = self.parse(completion, len(questions))
+
+        async def fallback(i: int) -> float:
+            return unit_interval(
+                await agent.relevance(context=paragraph, question=questions[i])
+            )
+
+        unrated = [i for i in range(len(questions)) if i not in ratings]
+        ratings.update(zip(unrated, await map_async(unrated, fallback)))
+        return [ratings[i] for i in range(len(questions))]
+
+
+STOPWORDS = frozenset(
+    """a an and are as at be by did do does e.g for from had has have how if in
+    into is it its of on or that the their there these they this to was were
+    what when where which who why with""".split()
+)
+
+
+def content_terms(text: str) -> set[str]:
+    # Crude stemming: "participants"/"participant", "administered"/"administer"
+    return {
+        word[:6]
+        for word in re.findall(r"[a-z0-9]+", text.lower())
+        if word not in STOPWORDS
+    }
+
+
+class LexicalScorer:
+    """
+    Local stand-in for LM scoring: the fraction of a question's content words
+    that occur in the paragraph. No LM calls, so search can run offline.
+    """
+
+    async def score(self, paragraph: str, questions: Sequence[str]) -> list[float]:
+        paragraph_terms = content_terms(paragraph)
+        scores = []
+        for question in questions:
+            question_terms = content_terms(question)
+            scores.append(
+                len(question_terms & paragraph_terms) / len(question_terms)
+                if question_terms
+                else 0.0
+            )
+        return scores
+
+
+@dataclass(frozen=True)
+class RankedParagraph:
+    paragraph: IndexedParagraph
+    score: float
+
+
+async def search_columns(
+    index: SectionIndex,
+    configs: Mapping[str, QAColumnConfig],
+    scorer: Optional[ParagraphScorer] = None,
+    top_n: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+) -> dict[str, list[RankedParagraph]]:
+    """
+    Rank each LMSearchStrategy column's paragraphs by relevance to its
+    question. Every paragraph is scored once, against the distinct questions
+    of all columns that read it, instead of once per column.
+    """
+    scorer = scorer or AgentBatchScorer()
+    columns = {
+        name: config
+        for name, config in configs.items()
+        if isinstance(config.search_strategy, LMSearchStrategy)
+    }
+    selections = {name: index.for_column(config) for name, config in columns.items()}
+
+    questions_by_paragraph: dict[int, list[str]] = {}
+    for name, paragraphs in selections.items():
+        for paragraph in paragraphs:
+            questions = questions_by_paragraph.setdefault(paragraph.index, [])
+            if columns[name].question not in questions:
+                questions.append(columns[name].question)
+
+    paragraphs = {paragraph.index: paragraph for paragraph in index.paragraphs}
+
+    async def score_paragraph(i: int) -> dict[str, float]:
+        questions = questions_by_paragraph[i]
+        return dict(zip(questions, await scorer.score(paragraphs[i].text, questions)))
+
+    scored = list(questions_by_paragraph)
+    scores = dict(
+        zip(
+            scored,
+            await map_async(scored, score_paragraph, max_concurrency=max_concurrency),
+        )
+    )
+
+    rankings = {}
+    for name, column_paragraphs in selections.items():
+        ranked = sorted(
+            (
+                RankedParagraph(paragraph, scores[paragraph.index][columns[name].question])
+                for paragraph in column_paragraphs
+            ),
+            key=lambda ranked_paragraph: -ranked_paragraph.score,
+        )
+        rankings[name] = ranked[:top_n] if top_n is not None else ranked
+    return rankings
@@ -0,0 +1,146 @@
+import dataclasses
+import re
+
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Iterable
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Any
+from typing import Optional
+
+from ice.contrib.ought_shared.qa.qa_column_config import AnswerStrategy
+from ice.contrib.ought_shared.qa.qa_column_config import QAColumnConfig
+from ice.contrib.ought_shared.qa.qa_column_config import qa_column_configs
+from ice.contrib.ought_shared.qa.qa_result import QAResult
+from ice.utils import map_async
+
+# Applied per column to the shared answer, so not part of what gets executed
+POST_PROCESSING_FIELDS = frozenset(["process_answer"])
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    A hashable value that is equal for equivalent strategy parameters.
+    """
+    if isinstance(value, re.Pattern):
+        return ("pattern", value.pattern, value.flags)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return (
+            type(value).__qualname__,
+            tuple(
+                (field.name, freeze(getattr(value, field.name)))
+                for field in dataclasses.fields(value)
+                if field.name not in POST_PROCESSING_FIELDS
+            ),
+        )
+    if isinstance(value, Mapping):
+        return ("mapping", tuple((freeze(k), freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if callable(value):
+        # Functions compare by identity
+        return value
+    # Parameterless strategies like LMSearchStrategy()
+    return type(value).__qualname__
+
+
+def column_fingerprint(config: QAColumnConfig) -> Hashable:
+    """
+    Everything that determines the raw answer for a column: the question, the
+    paragraphs it reads and its search and answer strategies. is_numerical
+    and process_answer only affect how the answer is used afterwards.
+    """
+    return (
+        config.question,
+        frozenset(config.sources),
+        freeze(config.ignore_section_pattern),
+        freeze(config.search_strategy),
+        freeze(config.answer_strategy),
+    )
+
+
+def without_post_processing(answer_strategy: AnswerStrategy) -> AnswerStrategy:
+    if getattr(answer_strategy, "process_answer", None) is None:
+        return answer_strategy
+    return dataclasses.replace(answer_strategy, process_answer=None)
+
+
+@dataclass
+class ColumnPlan:
+    # With process_answer removed; run once for all aliases
+    config: QAColumnConfig
+    aliases: list[str]
+    process_answers: dict[str, Optional[Callable[[str], str]]]
+
+    @property
+    def name(self) -> str:
+        return self.aliases[0]
+
+
+def plan_columns(
+    columns: Iterable[str],
+    configs: Mapping[str, QAColumnConfig] = qa_column_configs,
+) -> list[ColumnPlan]:
+    """
+    Group the requested columns by fingerprint, in order of first request.
+    """
+    plans: dict[Hashable, ColumnPlan] = {}
+    for column in columns:
+        config = configs[column]
+        fingerprint = column_fingerprint(config)
+        plan = plans.get(fingerprint)
+        if plan is None:
+            plan = plans[fingerprint] = ColumnPlan(
+                config=dataclasses.replace(
+                    config,
+                    answer_strategy=without_post_processing(config.answer_strategy),
+                ),
+                aliases=[],
+                process_answers={},
+            )
+        if column not in plan.process_answers:
+            plan.aliases.append(column)
+            plan.process_answers[column] = getattr(
+                config.answer_strategy, "process_answer", None
+            )
+    return list(plans.values())
+
+
+def fan_out(plan: ColumnPlan, result: QAResult) -> dict[str, QAResult]:
+    results = {}
+    for alias in plan.aliases:
+        process_answer = plan.process_answers[alias]
+        answer = result.answer
+        if answer is not None and process_answer is not None:
+            answer = process_answer(answer)
+        results[alias] = result.copy(
+            update={"question_short_name": alias, "answer": answer}
+        )
+    return results
+
+
+async def execute_plan(
+    plans: list[ColumnPlan],
+    run_column: Callable[[str, QAColumnConfig], Awaitable[QAResult]],
+    max_concurrency: Optional[int] = None,
+) -> dict[str, QAResult]:
+    """
+    Answer one document's columns, calling `run_column(name, config)` once
+    per plan and giving every alias its own copy of the result, with its
+    own process_answer applied.
+    """
+
+    async def run_plan(plan: ColumnPlan) -> QAResult:
+        return await run_column(plan.name, plan.config)
+
+    plan_results = await map_async(plans, run_plan, max_concurrency=max_concurrency)
+    results: dict[str, QAResult] = {}
+    for plan, result in zip(plans, plan_results):
+        results.update(fan_out(plan, result))
+    return results
@@ -0,0 +1,160 @@
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Mapping
+from typing import Any
+from typing import Optional
+
+from ice.contrib.ought_shared.qa.column_planner import execute_plan
+from ice.contrib.ought_shared.qa.column_planner import plan_columns
+from ice.contrib.ought_shared.qa.qa_column_config import CompositionalAnswerStrategy
+from ice.contrib.ought_shared.qa.qa_column_config import QAColumnConfig
+from ice.contrib.ought_shared.qa.qa_column_config import qa_column_configs
+from ice.contrib.ought_shared.qa.qa_result import QAResult
+from ice.recipe import recipe
+from ice.utils import map_async
+
+# GPT-2/GPT-3 <|endoftext|>; answer_bias is applied to it, so a negative
+# bias makes the model less likely to stop without answering
+END_OF_TEXT_TOKEN = "50256"
+
+RunColumn = Callable[[str, QAColumnConfig], Awaitable[QAResult]]
+Aggregate = Callable[[str, QAColumnConfig, dict[str, QAResult]], Awaitable[QAResult]]
+
+
+def sub_column_name(column: Any) -> str:
+    """
+    The predefined column a sub-question refers to. Accepts Column objects
+    (with a `value`), their dict form, or a plain column name.
+    """
+    if isinstance(column, str):
+        return column
+    if isinstance(column, Mapping):
+        return column["value"]
+    return column.value
+
+
+def is_compositional(config: QAColumnConfig) -> bool:
+    return isinstance(config.answer_strategy, CompositionalAnswerStrategy)
+
+
+def column_order(
+    columns: Iterable[str], configs: Mapping[str, QAColumnConfig]
+) -> list[str]:
+    """
+    The requested columns and everything they depend on, each after its
+    sub-columns.
+    """
+    order: list[str] = []
+    visiting: set[str] = set()
+
+    def visit(column: str):
+        if column in order:
+            return
+        if column in visiting:
+            raise ValueError(f"Compositional column {column!r} depends on itself")
+        visiting.add(column)
+        config = configs[column]
+        if is_compositional(config):
+            for sub_column in config.answer_strategy.sub_questions.values():
+                visit(sub_column_name(sub_column))
+        visiting.remove(column)
+        order.append(column)
+
+    for column in columns:
+        visit(column)
+    return order
+
+
+async def aggregate_with_agent(
+    column: str, config: QAColumnConfig, sub_results: dict[str, QAResult]
+) -> QAResult:
+    """
+    One completion of the strategy's aggregation prompt, with its answer_bias,
+    recorded on a copy of the first sub-result with the excerpts of all of
+    them.
+    """
+    if not sub_results:
+        raise ValueError(f"Compositional column {column!r} has no sub-questions")
+    strategy: CompositionalAnswerStrategy = config.answer_strategy
+    prompt = strategy.create_aggregation_prompt(sub_results)
+    kwargs = (
+        {"logit_bias": {END_OF_TEXT_TOKEN: strategy.answer_bias}}
+        if strategy.answer_bias
+        else {}
+    )
+    answer = await recipe.agent().complete(
+        prompt=prompt, stop=strategy.openai_stop, **kwargs
+    )
+    template = next(iter(sub_results.values()))
+    excerpts = list(
+        dict.fromkeys(
+            excerpt for result in sub_results.values() for excerpt in result.excerpts
+        )
+    )
+    return template.copy(
+        update={
+            "question_short_name": column,
+            "answer": answer.strip(),
+            "excerpts": excerpts,
+        }
+    )
+
+
+async def answer_columns(
+    columns: list[str],
+    run_column: RunColumn,
+    aggregate: Aggregate = aggregate_with_agent,
+    configs: Mapping[str, QAColumnConfig] = qa_column_configs,
+    known: Optional[Mapping[str, QAResult]] = None,
+    max_concurrency: Optional[int] = None,
+) -> dict[str, QAResult]:
+    """
+    Answer one document's columns, compositional ones included. All
+    non-compositional columns (requested or needed as sub-columns) run
+    concurrently and at most once, reusing anything in `known`. Each
+    compositional column then costs one aggregation call, after its
+    sub-columns are done.
+    """
+    results: dict[str, QAResult] = dict(known or {})
+    order = column_order(columns, configs)
+
+    leaves = [
+        column
+        for column in order
+        if column not in results and not is_compositional(configs[column])
+    ]
+    results.update(
+        await execute_plan(
+            plan_columns(leaves, configs), run_column, max_concurrency=max_concurrency
+        )
+    )
+
+    # Compositional columns whose sub-columns are all done run together
+    pending = [column for column in order if column not in results]
+    while pending:
+        ready = [
+            column
+            for column in pending
+            if all(
+                sub_column_name(sub_column) in results
+                for sub_column in configs[column].answer_strategy.sub_questions.values()
+            )
+        ]
+
+        async def run_aggregate(column: str) -> QAResult:
+            sub_questions = configs[column].answer_strategy.sub_questions
+            sub_results = {
+                label: results[sub_column_name(sub_column)]
+                for label, sub_column in sub_questions.items()
+            }
+            return await aggregate(column, configs[column], sub_results)
+
+        for column, result in zip(
+            ready,
+            await map_async(ready, run_aggregate, max_concurrency=max_concurrency),
+        ):
+            results[column] = result
+        pending = [column for column in pending if column not in results]
+
+    return {column: results[column] for column in columns}
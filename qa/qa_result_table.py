@@ -0,0 +1,218 @@
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+from typing import Optional
+from typing import Union
+from typing import get_args
+from typing import get_origin
+from typing import get_type_hints
+
+import pandas as pd
+import pydantic
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from ice.contrib.ought_shared.qa.qa_result import QAResult
+
+# Few distinct values repeated across millions of rows
+DICTIONARY_FIELDS = frozenset(
+    ["question_short_name", "experiment", "recipe", "time", "elicit_commit"]
+)
+
+Records = Union[pd.DataFrame, Mapping[str, Sequence], Sequence[Mapping[str, Any]]]
+
+# ice is on pydantic v1, but nothing here depends on it: field types come from
+# the annotations, and the few model APIs v2 renamed go through the helpers
+# below
+PYDANTIC_V2 = int(pydantic.VERSION.split(".")[0]) >= 2
+
+
+def model_fields(model: type[QAResult]) -> Mapping[str, Any]:
+    return model.model_fields if PYDANTIC_V2 else model.__fields__
+
+
+def is_required(model_field: Any) -> bool:
+    return model_field.is_required() if PYDANTIC_V2 else model_field.required
+
+
+def field_default(model_field: Any) -> Any:
+    if PYDANTIC_V2:
+        return model_field.get_default(call_default_factory=True)
+    return model_field.get_default()
+
+
+def construct(model: type[QAResult], values: dict[str, Any]) -> QAResult:
+    """
+    An instance built from already validated values, without validation.
+    """
+    if PYDANTIC_V2:
+        return model.model_construct(**values)
+    return model.construct(**values)
+
+
+def as_dict(result: QAResult) -> dict[str, Any]:
+    return result.model_dump() if PYDANTIC_V2 else result.dict()
+
+
+def is_optional_type(hint: Any) -> bool:
+    return hint is Any or type(None) in get_args(hint)
+
+
+def is_sequence_type(hint: Any) -> bool:
+    origin = get_origin(hint)
+    return (
+        isinstance(origin, type)
+        and issubclass(origin, Sequence)
+        and not issubclass(origin, str)
+    )
+
+
+def arrow_schema(model: type[QAResult]) -> pa.Schema:
+    """
+    One Arrow field per model field. Strings in DICTIONARY_FIELDS are
+    dictionary-encoded and sequence fields become lists of strings.
+    """
+    hints = get_type_hints(model)
+    fields = []
+    for name, model_field in model_fields(model).items():
+        if is_sequence_type(hints[name]):
+            arrow_type = pa.list_(pa.string())
+        elif name in DICTIONARY_FIELDS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = pa.string()
+        nullable = is_optional_type(hints[name]) or (
+            not is_required(model_field) and field_default(model_field) is None
+        )
+        fields.append(pa.field(name, arrow_type, nullable=nullable))
+    return pa.schema(fields)
+
+
+def to_columns(records: Records) -> dict[str, Sequence]:
+    if isinstance(records, pd.DataFrame):
+        return {column: records[column] for column in records.columns}
+    if isinstance(records, Mapping):
+        return dict(records)
+    records = list(records)
+    columns: dict[str, list] = {}
+    for key in {key for record in records for key in record}:
+        columns[key] = [record.get(key) for record in records]
+    return columns
+
+
+class QAResultTable:
+    """
+    QAResults (or a subclass such as ElicitQAResult) stored column by column
+    in Arrow. Rows are validated a column at a time when appended, and model
+    instances are only built by `row`/iteration.
+    """
+
+    def __init__(self, model: type[QAResult] = QAResult):
+        self.model = model
+        self.schema = arrow_schema(model)
+        self._batches: list[pa.RecordBatch] = []
+        self._table: Optional[pa.Table] = None
+
+    def __len__(self) -> int:
+        return sum(batch.num_rows for batch in self._batches)
+
+    def _validate(self, columns: dict[str, Sequence]) -> pa.RecordBatch:
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        unknown = set(columns) - set(self.schema.names)
+        if unknown:
+            raise ValueError(
+                f"Unknown {self.model.__name__} fields: {sorted(unknown)}"
+            )
+
+        arrays = []
+        for arrow_field in self.schema:
+            name = arrow_field.name
+            model_field = model_fields(self.model)[name]
+            if name not in columns:
+                if is_required(model_field):
+                    raise ValueError(f"Missing required field {name!r}")
+                values: Sequence = [field_default(model_field) for _ in range(n_rows)]
+            else:
+                values = columns[name]
+            if len(values) != n_rows:
+                raise ValueError(
+                    f"Field {name!r} has {len(values)} values, expected {n_rows}"
+                )
+            if pa.types.is_list(arrow_field.type) and any(
+                isinstance(value, str) for value in values
+            ):
+                raise ValueError(
+                    f"Field {name!r} must be a sequence of strings, not a string"
+                )
+            try:
+                array = pa.array(values, type=arrow_field.type, from_pandas=True)
+            except (pa.ArrowTypeError, pa.ArrowInvalid) as e:
+                raise ValueError(f"Invalid values for field {name!r}: {e}") from e
+            if not arrow_field.nullable and array.null_count:
+                rows = pc.indices_nonzero(array.is_null()).to_pylist()[:10]
+                raise ValueError(f"Field {name!r} is null in rows {rows}")
+            arrays.append(array)
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def append(self, records: Records) -> None:
+        """
+        Validate and add rows, given as a DataFrame, a dict of columns, or a
+        sequence of dicts.
+        """
+        batch = self._validate(to_columns(records))
+        if batch.num_rows:
+            self._batches.append(batch)
+            self._table = None
+
+    def extend(self, results: Iterable[QAResult]) -> None:
+        records = [as_dict(result) for result in results]
+        if records:
+            self.append(records)
+
+    @property
+    def table(self) -> pa.Table:
+        if self._table is None:
+            self._table = pa.Table.from_batches(
+                self._batches, schema=self.schema
+            ).unify_dictionaries()
+        return self._table
+
+    def to_pandas(self) -> pd.DataFrame:
+        """
+        Dictionary-encoded fields become categoricals; string columns are
+        converted without copying where pyarrow allows it.
+        """
+        return self.table.to_pandas(split_blocks=True)
+
+    def row(self, i: int) -> QAResult:
+        values = {
+            name: column[i].as_py()
+            for name, column in zip(self.table.column_names, self.table.columns)
+        }
+        # Already validated on append
+        return construct(self.model, values)
+
+    def __iter__(self) -> Iterator[QAResult]:
+        for batch in self.table.to_batches():
+            for values in batch.to_pylist():
+                yield construct(self.model, values)
+
+    def write_parquet(self, path: Union[str, Path]) -> None:
+        pq.write_table(self.table, path)
+
+    @classmethod
+    def read_parquet(
+        cls,
+        path: Union[str, Path],
+        model: type[QAResult] = QAResult,
+        memory_map: bool = True,
+    ) -> "QAResultTable":
+        result_table = cls(model)
+        table = pq.read_table(path, memory_map=memory_map).cast(result_table.schema)
+        result_table._batches = table.to_batches()
+        result_table._table = table
+        return result_table
@@ -0,0 +1,120 @@
+import re
+
+from collections.abc import Collection
+from dataclasses import dataclass
+from typing import Optional
+
+from ice.contrib.ought_shared.qa.qa_column_config import QAColumnConfig
+from ice.contrib.ought_shared.qa.qa_column_config import Source
+from ice.paper import Paper
+
+
+@dataclass(frozen=True)
+class IndexedParagraph:
+    # Position in paper.paragraphs
+    index: int
+    text: str
+    source: Source
+    section_titles: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class SectionSpan:
+    source: Source
+    titles: tuple[str, ...]
+    # Positions in SectionIndex.paragraphs, end exclusive
+    start: int
+    end: int
+
+
+SECTION_SOURCES: dict[str, Source] = {"abstract": "abstract", "main": "body"}
+
+
+def paragraph_source(section_type: str) -> "Optional[Source]":
+    """
+    The source of a paragraph in a section of this type, or None for back
+    matter (references, appendices), which no source includes.
+    """
+    return SECTION_SOURCES.get(section_type)
+
+
+class SectionIndex:
+    """
+    A paper's non-empty abstract and main-text paragraphs, segmented once, with their source
+    (abstract or body) and section titles. Columns ask for their paragraphs
+    with `for_column`; the masks for each distinct ignore_section_pattern and
+    each (sources, pattern) selection are computed on first use and shared.
+    """
+
+    def __init__(self, paper: Paper):
+        self.document_id = paper.document_id
+        self.paragraphs = [
+            IndexedParagraph(
+                index=i,
+                text=str(paragraph),
+                source=paragraph_source(paragraph.section_type),
+                section_titles=tuple(section.title for section in paragraph.sections),
+            )
+            for i, paragraph in enumerate(paper.paragraphs)
+            if paragraph.is_body_paragraph() and not paragraph.is_empty()
+        ]
+        self.sections = self._find_sections()
+        self._ignore_masks: dict[re.Pattern, list[bool]] = {}
+        self._selections: dict[
+            tuple[frozenset, Optional[re.Pattern]], list[IndexedParagraph]
+        ] = {}
+
+    def _find_sections(self) -> list[SectionSpan]:
+        sections: list[SectionSpan] = []
+        start = 0
+        for i, paragraph in enumerate(self.paragraphs):
+            next_paragraph = (
+                self.paragraphs[i + 1] if i + 1 < len(self.paragraphs) else None
+            )
+            if (
+                next_paragraph is None
+                or next_paragraph.source != paragraph.source
+                or next_paragraph.section_titles != paragraph.section_titles
+            ):
+                sections.append(
+                    SectionSpan(paragraph.source, paragraph.section_titles, start, i + 1)
+                )
+                start = i + 1
+        return sections
+
+    def ignore_mask(self, pattern: re.Pattern) -> list[bool]:
+        """
+        True for each paragraph with a section title matching `pattern`.
+        """
+        if pattern not in self._ignore_masks:
+            ignored_sections = {
+                titles: any(pattern.search(title) for title in titles)
+                for titles in {section.titles for section in self.sections}
+            }
+            self._ignore_masks[pattern] = [
+                ignored_sections[paragraph.section_titles]
+                for paragraph in self.paragraphs
+            ]
+        return self._ignore_masks[pattern]
+
+    def select(
+        self,
+        sources: Collection[Source],
+        ignore_section_pattern: Optional[re.Pattern] = None,
+    ) -> list[IndexedParagraph]:
+        key = (frozenset(sources), ignore_section_pattern)
+        if key not in self._selections:
+            mask = (
+                self.ignore_mask(ignore_section_pattern)
+                if ignore_section_pattern is not None
+                else [False] * len(self.paragraphs)
+            )
+            self._selections[key] = [
+                paragraph
+                for paragraph, ignored in zip(self.paragraphs, mask)
+                if paragraph.source in key[0] and not ignored
+            ]
+        return self._selections[key]
+
+    def for_column(self, config: QAColumnConfig) -> list[IndexedParagraph]:
+        return self.select(config.sources, config.ignore_section_pattern)
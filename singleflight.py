@@ -0,0 +1,105 @@
+import json
+
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from typing import Any
+from typing import Generic
+from typing import Optional
+from typing import TypeVar
+
+import anyio
+
+from ice.agents.base import Agent
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self):
+        self.done = anyio.Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+        self.cancelled = False
+
+
+class SingleFlight:
+    """
+    Concurrent `do` calls with the same key share one run of `fn`: the
+    first caller runs it, and the ones that arrive while it's in flight wait
+    for its result (or its exception). If the first caller is cancelled, a
+    waiting caller runs `fn` instead. Nothing is kept once the call is done.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while key in self._calls:
+            call = self._calls[key]
+            await call.done.wait()
+            if call.cancelled:
+                continue
+            self.coalesced += 1
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore[return-value]
+
+        call = _Call()
+        self._calls[key] = call
+        self.calls += 1
+        try:
+            call.result = await fn()
+            return call.result
+        except anyio.get_cancelled_exc_class():
+            call.cancelled = True
+            raise
+        except BaseException as e:
+            # Including non-Exception errors, so waiters never see a None result
+            call.error = e
+            raise
+        finally:
+            del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+def call_key(method: str, model: str, kwargs: dict[str, Any]) -> str:
+    return json.dumps([method, model, kwargs], sort_keys=True, default=str)
+
+
+class CoalescingAgent(Agent):
+    """
+    Identical concurrent calls to the wrapped agent (same method, model and
+    arguments) are sent once, through `flight`.
+    """
+
+    def __init__(self, agent: Agent, flight: SingleFlight):
+        self.agent = agent
+        self.flight = flight
+        self.model = getattr(agent, "model", None) or type(agent).__name__
+
+    async def _coalesced(self, method: str, kwargs: dict[str, Any]):
+        return await self.flight.do(
+            call_key(method, self.model, kwargs),
+            lambda: getattr(self.agent, method)(**kwargs),
+        )
+
+    async def complete(self, **kwargs) -> str:
+        return await self._coalesced("complete", kwargs)
+
+    async def classify(self, **kwargs):
+        return await self._coalesced("classify", kwargs)
+
+    async def relevance(self, **kwargs) -> float:
+        return await self._coalesced("relevance", kwargs)
+
+    async def predict(self, **kwargs) -> dict[str, float]:
+        return await self._coalesced("predict", kwargs)
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from ice.contrib.ought_shared.consort_flow.add_adherence import merge_adherence
+from ice.recipes.consort_flow.types import ConsortFlow
+
+
+def flow(*experiments: tuple[str, list[tuple[str, str]]]) -> ConsortFlow:
+    return ConsortFlow.parse_obj(
+        {
+            "experiments": [
+                {
+                    "name": name,
+                    "enrolment": None,
+                    "arms": [
+                        {
+                            "name": arm,
+                            "allocated": None,
+                            "received": {"description": received, "quotes": []},
+                            "attrition": None,
+                            "analyzed": None,
+                        }
+                        for arm, received in arms
+                    ],
+                }
+                for name, arms in experiments
+            ]
+        }
+    )
+
+
+def test_first_duplicate_arm_wins_and_is_reported():
+    v1 = flow(("trial", [("drug", "v1"), ("placebo", "v1")]))
+    adherence = flow(
+        ("trial", [("drug", "first"), ("drug", "second"), ("placebo", "first")]),
+        ("trial", [("placebo", "second")]),
+    )
+    [merged], report = merge_adherence(
+        pd.DataFrame({"document_id": ["paper"], "flow_answer": [v1]}),
+        pd.DataFrame({"document_id": ["paper"], "flow_answer": [adherence]}),
+    )
+    arms = merged.experiments[0].arms
+    assert [arm.received.description for arm in arms] == ["first", "first"]
+    assert report.duplicate_arms == [("paper", "trial", "drug")]
+    assert report.duplicate_experiments == [("paper", "trial")]
+    assert report.missing_arms == []
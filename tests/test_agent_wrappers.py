@@ -0,0 +1,17 @@
+from ice.contrib.ought_shared.eval.agent_wrappers import use_agent
+from ice.contrib.ought_shared.eval.agent_wrappers import wrap_agents
+from ice.contrib.ought_shared.eval.simulated_agent import SimulatedAgent
+from ice.contrib.ought_shared.singleflight import CoalescingAgent
+from ice.contrib.ought_shared.singleflight import SingleFlight
+from ice.recipe import recipe
+
+
+def test_wrap_agents_nests_and_restores():
+    agent = SimulatedAgent()
+    with use_agent(agent):
+        with wrap_agents(lambda inner: CoalescingAgent(inner, SingleFlight())):
+            wrapped = recipe.agent("any")
+            assert isinstance(wrapped, CoalescingAgent)
+            assert wrapped.agent is agent
+        assert recipe.agent() is agent
+    assert "agent" not in recipe.__dict__
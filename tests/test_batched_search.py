@@ -0,0 +1,88 @@
+import anyio
+
+from ice.agents.base import Agent
+from ice.contrib.ought_shared.eval.agent_wrappers import isolated_caches
+from ice.contrib.ought_shared.qa.batched_search import AgentBatchScorer
+from ice.contrib.ought_shared.qa.batched_search import search_columns
+from ice.contrib.ought_shared.qa.qa_column_config import qa_column_configs
+from ice.contrib.ought_shared.qa.section_index import SectionIndex
+from ice.paper import Paper
+
+scorer = AgentBatchScorer()
+
+
+def test_parse_continues_the_prompted_first_line():
+    assert scorer.parse(" 7\n2: 5\n3: 10", 3) == {0: 0.7, 1: 0.5, 2: 1.0}
+
+
+def test_parse_leading_newline_leaves_first_question_unrated():
+    assert scorer.parse("\n2: 5\n3: 9", 3) == {1: 0.5, 2: 0.9}
+
+
+def test_parse_missing_lines_are_unrated():
+    assert scorer.parse(" 4\n3: 8", 3) == {0: 0.4, 2: 0.8}
+    assert scorer.parse(" \n3: 8", 3) == {2: 0.8}
+
+
+def test_parse_ignores_out_of_range_and_repeated_numbers():
+    assert scorer.parse(" 1\n1: 9\n4: 9\n2: 30", 2) == {0: 0.1, 1: 1.0}
+
+
+class UnratingAgent(Agent):
+    """
+    Never gives a parseable rating, so every score comes from relevance.
+    """
+
+    def __init__(self, relevance: dict[tuple[str, str], float]):
+        self.scores = relevance
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, **kwargs) -> str:
+        return " I can't rate these."
+
+    async def relevance(self, *, context: str, question: str, **kwargs) -> float:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await anyio.sleep(0.01)
+        self.in_flight -= 1
+        return self.scores[context, question]
+
+
+def test_search_columns_falls_back_to_relevance_on_the_same_scale():
+    paper = Paper.parse_obj(
+        {
+            "paragraphs": [
+                {"sentences": [text], "sections": [], "sectionType": "main"}
+                for text in ["Adults aged 20-30.", "Both sexes."]
+            ]
+        }
+    )
+    configs = {column: qa_column_configs[column] for column in ["age", "sex"]}
+    age, sex = (configs[column].question for column in ["age", "sex"])
+    agent = UnratingAgent(
+        {
+            ("Adults aged 20-30.", age): 0.9,
+            ("Adults aged 20-30.", sex): -2.0,
+            ("Both sexes.", age): 0.1,
+            ("Both sexes.", sex): 7.5,
+        }
+    )
+
+    async def main():
+        return await search_columns(
+            SectionIndex(paper), configs, scorer=AgentBatchScorer(agent=agent)
+        )
+
+    with isolated_caches():
+        rankings = anyio.run(main)
+    # Paragraphs are scored concurrently, and so are their fallback calls
+    assert agent.max_in_flight == 4
+    assert [(r.paragraph.text, r.score) for r in rankings["age"]] == [
+        ("Adults aged 20-30.", 0.9),
+        ("Both sexes.", 0.1),
+    ]
+    assert [(r.paragraph.text, r.score) for r in rankings["sex"]] == [
+        ("Both sexes.", 1.0),
+        ("Adults aged 20-30.", 0.0),
+    ]
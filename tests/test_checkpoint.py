@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from ice.contrib.ought_shared.eval.checkpoint import CheckpointExists
+from ice.contrib.ought_shared.eval.checkpoint import CheckpointMismatch
+from ice.contrib.ought_shared.eval.checkpoint import RowCheckpoint
+from ice.contrib.ought_shared.eval.checkpoint import dataframe_identity
+from ice.contrib.ought_shared.eval.checkpoint import file_identity
+
+
+def test_resume_skips_finished_rows(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    checkpoint = RowCheckpoint(path, input_id="a")
+    checkpoint.append(0, "zero")
+    checkpoint.append(2, {"answer": "two"})
+    checkpoint.close()
+
+    resumed = RowCheckpoint(path, resume=True, input_id="a")
+    assert resumed.is_done(0) and resumed.is_done(2) and not resumed.is_done(1)
+    resumed.append(1, "one")
+    resumed.close()
+    assert resumed.results([0, 1, 2]) == ["zero", "one", {"answer": "two"}]
+
+
+def test_without_resume_an_existing_checkpoint_is_kept(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    checkpoint = RowCheckpoint(path, input_id="a")
+    checkpoint.append(0, "zero")
+    checkpoint.close()
+    with pytest.raises(CheckpointExists):
+        RowCheckpoint(path, input_id="a")
+    assert RowCheckpoint(path, resume=True, input_id="a").is_done(0)
+    assert len(RowCheckpoint(path, input_id="a", overwrite=True)) == 0
+
+
+def test_resume_refuses_another_input(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    RowCheckpoint(path, input_id="a").close()
+    with pytest.raises(CheckpointMismatch):
+        RowCheckpoint(path, resume=True, input_id="b")
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = tmp_path / "run.checkpoint.jsonl"
+    checkpoint = RowCheckpoint(path, input_id="a")
+    checkpoint.append(0, "zero")
+    checkpoint.close()
+    with path.open("a") as f:
+        f.write('{"row": "1", "res')
+
+    resumed = RowCheckpoint(path, resume=True, input_id="a")
+    assert len(resumed) == 1
+    resumed.append(1, "one")
+    resumed.close()
+    assert resumed.results([0, 1]) == ["zero", "one"]
+
+
+def test_input_identity_changes_with_contents(tmp_path):
+    path = tmp_path / "input.csv"
+    path.write_text("question\nq1\n")
+    before = file_identity(path)
+    assert file_identity(path) == before
+    path.write_text("question\nq2\n")
+    assert file_identity(path) != before
+
+    df = pd.DataFrame({"question": ["q1", "q2", "q3"], "tags": [["a"], [], ["b"]]})
+    assert dataframe_identity(df) == dataframe_identity(df.copy())
+    assert dataframe_identity(df, chunksize=2) == dataframe_identity(df)
+    assert dataframe_identity(df) != dataframe_identity(df.assign(question=["q1", "q2", "q4"]))
+    assert dataframe_identity(df) != dataframe_identity(df.rename(columns={"question": "q"}))
+    assert dataframe_identity(df) != dataframe_identity(df.iloc[:2])
@@ -0,0 +1,86 @@
+import dataclasses
+from collections import Counter
+
+import anyio
+
+from ice.contrib.ought_shared.qa.column_planner import execute_plan
+from ice.contrib.ought_shared.qa.column_planner import fan_out
+from ice.contrib.ought_shared.qa.column_planner import plan_columns
+from ice.contrib.ought_shared.qa.qa_column_config import QAColumnConfig
+from ice.contrib.ought_shared.qa.qa_column_config import qa_column_configs
+from ice.contrib.ought_shared.qa.qa_result import QAResult
+
+AGE_COLUMNS = ["age", "Age of participants", "participant-age"]
+
+
+def result(column: str, answer: str | None) -> QAResult:
+    return QAResult(
+        question_short_name=column,
+        document_id="paper.pdf",
+        answer=answer,
+        experiment="",
+        excerpts=["excerpt"],
+        recipe="test",
+        time="",
+        title="",
+    )
+
+
+def test_equivalent_columns_share_a_plan():
+    plans = plan_columns(
+        ["outcome", "intervention", *AGE_COLUMNS, "outcome-measured", "duration"]
+    )
+    assert [plan.aliases for plan in plans] == [
+        ["outcome", "outcome-measured"],
+        ["intervention"],
+        AGE_COLUMNS,
+        ["duration"],
+    ]
+    # process_answer is kept per alias, not in the config that runs
+    assert plans[0].config.answer_strategy.process_answer is None
+    assert all(plans[0].process_answers.values())
+    assert plans[2].process_answers == dict.fromkeys(AGE_COLUMNS)
+
+
+def test_repeated_columns_are_planned_once():
+    [plan] = plan_columns(["age", "age", "participant-age"])
+    assert plan.aliases == ["age", "participant-age"]
+
+
+def test_process_answer_is_applied_per_alias():
+    outcome = qa_column_configs["outcome"]
+    configs = {
+        "outcome": outcome,
+        "outcome-measured": qa_column_configs["outcome-measured"],
+        "outcome-upper": dataclasses.replace(
+            outcome,
+            answer_strategy=dataclasses.replace(
+                outcome.answer_strategy, process_answer=str.upper
+            ),
+        ),
+        "age": qa_column_configs["age"],
+    }
+    runs = Counter()
+
+    async def run_column(column: str, config: QAColumnConfig) -> QAResult:
+        runs[column] += 1
+        return result(column, f"{column} answer")
+
+    results = anyio.run(execute_plan, plan_columns(list(configs), configs), run_column)
+    assert runs == Counter({"outcome": 1, "age": 1})
+    assert {column: r.answer for column, r in results.items()} == {
+        "outcome": "• outcome answer",
+        "outcome-measured": "• outcome answer",
+        "outcome-upper": "OUTCOME ANSWER",
+        "age": "age answer",
+    }
+    assert {column: r.question_short_name for column, r in results.items()} == {
+        column: column for column in configs
+    }
+
+
+def test_fan_out_leaves_missing_answers_alone():
+    [plan] = plan_columns(["outcome", "outcome-measured"])
+    results = fan_out(plan, result("outcome", None))
+    assert [r.answer for r in results.values()] == [None, None]
+    assert [r.excerpts for r in results.values()] == [["excerpt"], ["excerpt"]]
@@ -0,0 +1,40 @@
+import anyio
+
+from ice.contrib.ought_shared.completion_cache import MISSING
+from ice.contrib.ought_shared.completion_cache import DiskCache
+
+
+def test_async_get_and_set(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite")
+
+    async def main():
+        assert await cache.get_async("k") is MISSING
+        await cache.set_async("k", {"answer": 1})
+        return await cache.get_async("k")
+
+    assert anyio.run(main) == {"answer": 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_eviction_counts_entries_written_by_other_connections(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    value = "x" * 1000
+    first = DiskCache(path, max_bytes=2500)
+    second = DiskCache(path, max_bytes=2500)
+    first.set("a", value)
+    second.set("b", value)
+    first.set("c", value)
+    assert len(first) == 2
+    assert first.get("a") is MISSING
+    assert second.stats()["bytes"] <= 2500
+
+
+def test_hits_keep_recently_used_entries(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite", max_bytes=2500)
+    value = "x" * 1000
+    cache.set("a", value)
+    cache.set("b", value)
+    assert cache.get("a") == value
+    cache.set("c", value)
+    assert cache.get("a") == value
+    assert cache.get("b") is MISSING
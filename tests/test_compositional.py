@@ -0,0 +1,163 @@
+from collections import Counter
+
+import anyio
+import pytest
+
+from ice.agents.base import Agent
+from ice.contrib.ought_shared.eval.agent_wrappers import use_agent
+from ice.contrib.ought_shared.qa.compositional import END_OF_TEXT_TOKEN
+from ice.contrib.ought_shared.qa.compositional import aggregate_with_agent
+from ice.contrib.ought_shared.qa.compositional import answer_columns
+from ice.contrib.ought_shared.qa.qa_column_config import CompositionalAnswerStrategy
+from ice.contrib.ought_shared.qa.qa_column_config import LMSearchStrategy
+from ice.contrib.ought_shared.qa.qa_column_config import QAColumnConfig
+from ice.contrib.ought_shared.qa.qa_column_config import qa_column_configs
+from ice.contrib.ought_shared.qa.qa_result import QAResult
+
+
+class RecordingAgent(Agent):
+    def __init__(self):
+        self.calls = []
+
+    async def complete(self, **kwargs) -> str:
+        self.calls.append(kwargs)
+        return " combined "
+
+
+def config(answer_bias: float) -> QAColumnConfig:
+    return QAColumnConfig(
+        question="Population",
+        search_strategy=LMSearchStrategy(),
+        answer_strategy=CompositionalAnswerStrategy(
+            answer_bias=answer_bias,
+            sub_questions={"age": "age", "sex": "sex"},
+            create_aggregation_prompt=lambda results: " / ".join(results),
+        ),
+    )
+
+
+def result(column: str, excerpts: list[str]) -> QAResult:
+    return QAResult(
+        question_short_name=column,
+        document_id="paper.pdf",
+        answer=column,
+        experiment="",
+        excerpts=excerpts,
+        recipe="test",
+        time="",
+        title="",
+    )
+
+
+def test_aggregate_applies_answer_bias_and_merges_excerpts():
+    agent = RecordingAgent()
+    sub_results = {"age": result("age", ["a", "b"]), "sex": result("sex", ["b", "c"])}
+    with use_agent(agent):
+        aggregated = anyio.run(
+            aggregate_with_agent, "population", config(-3.4), sub_results
+        )
+    assert agent.calls[0]["prompt"] == "age / sex"
+    assert agent.calls[0]["logit_bias"] == {END_OF_TEXT_TOKEN: -3.4}
+    assert aggregated.question_short_name == "population"
+    assert aggregated.answer == "combined"
+    assert list(aggregated.excerpts) == ["a", "b", "c"]
+
+
+def test_aggregate_without_sub_results_fails_before_calling_the_agent():
+    agent = RecordingAgent()
+    with use_agent(agent), pytest.raises(ValueError):
+        anyio.run(aggregate_with_agent, "population", config(0), {})
+    assert agent.calls == []
+
+
+def compositional(sub_questions: dict) -> QAColumnConfig:
+    return QAColumnConfig(
+        question="Summary",
+        search_strategy=LMSearchStrategy(),
+        answer_strategy=CompositionalAnswerStrategy(
+            answer_bias=0,
+            sub_questions=sub_questions,
+            create_aggregation_prompt=lambda results: " / ".join(results),
+        ),
+    )
+
+
+COMPOSITIONAL_CONFIGS = {
+    **{
+        column: qa_column_configs[column]
+        for column in ["age", "Age of participants", "sex", "intervention"]
+    },
+    "population": compositional({"Age": {"value": "age"}, "Sex": "sex"}),
+    "summary": compositional(
+        {
+            "Population": "population",
+            "Age": "Age of participants",
+            "Intervention": "intervention",
+        }
+    ),
+}
+
+
+class Counting:
+    def __init__(self):
+        self.runs = Counter()
+        self.aggregated = []
+
+    async def run_column(self, column: str, config: QAColumnConfig) -> QAResult:
+        self.runs[column] += 1
+        return result(column, [column])
+
+    async def aggregate(
+        self, column: str, config: QAColumnConfig, sub_results: dict[str, QAResult]
+    ) -> QAResult:
+        self.aggregated.append((column, sorted(sub_results)))
+        return result(
+            column, [excerpt for r in sub_results.values() for excerpt in r.excerpts]
+        ).copy(update={"answer": " + ".join(r.answer for r in sub_results.values())})
+
+
+def answer(columns: list[str], counting: Counting, **kwargs) -> dict[str, QAResult]:
+    async def main():
+        return await answer_columns(
+            columns,
+            counting.run_column,
+            aggregate=counting.aggregate,
+            configs=COMPOSITIONAL_CONFIGS,
+            **kwargs,
+        )
+
+    return anyio.run(main)
+
+
+def test_answer_columns_runs_each_sub_column_once_before_its_aggregate():
+    counting = Counting()
+    results = answer(["summary", "sex", "population"], counting)
+    # age and "Age of participants" ask the same question, so run as one
+    assert counting.runs == Counter({"age": 1, "sex": 1, "intervention": 1})
+    assert counting.aggregated == [
+        ("population", ["Age", "Sex"]),
+        ("summary", ["Age", "Intervention", "Population"]),
+    ]
+    assert list(results) == ["summary", "sex", "population"]
+    assert results["population"].answer == "age + sex"
+    # "Age of participants" shares the answer of age
+    assert results["summary"].answer == "age + sex + age + intervention"
+
+
+def test_answer_columns_reuses_known_and_standalone_results():
+    counting = Counting()
+    known_age = result("age", ["from an earlier run"])
+    results = answer(["sex", "population", "age"], counting, known={"age": known_age})
+    assert counting.runs == Counter({"sex": 1})
+    assert results["age"] is known_age
+    assert results["population"].excerpts == ["from an earlier run", "sex"]
+
+
+def test_answer_columns_rejects_cycles():
+    configs = {"a": compositional({"B": "b"}), "b": compositional({"A": "a"})}
+    counting = Counting()
+    with pytest.raises(ValueError):
+        anyio.run(
+            answer_columns, ["a"], counting.run_column, counting.aggregate, configs
+        )
+    assert counting.runs == Counter() and counting.aggregated == []
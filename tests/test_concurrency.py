@@ -0,0 +1,79 @@
+import anyio
+import pytest
+
+from ice.contrib.ought_shared.eval.concurrency import AdaptiveConcurrency
+from ice.contrib.ought_shared.eval.concurrency import is_overload_error
+from ice.contrib.ought_shared.eval.concurrency import map_async_adaptive
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def test_cancelled_calls_release_their_slots():
+    concurrency = AdaptiveConcurrency(initial_limit=2, max_limit=2)
+
+    async def main():
+        async with anyio.create_task_group() as tg:
+            for _ in range(2):
+                tg.start_soon(concurrency.run, anyio.sleep, 10)
+            await anyio.sleep(0.01)
+            assert concurrency.in_flight == 2
+            tg.cancel_scope.cancel()
+        assert concurrency.in_flight == 0
+
+        with anyio.fail_after(1):
+            return await map_async_adaptive([1, 2, 3], _double, concurrency)
+
+    assert anyio.run(main) == [2, 4, 6]
+
+
+async def _double(x: int) -> int:
+    return 2 * x
+
+
+def test_overload_errors_are_retried_and_back_off():
+    concurrency = AdaptiveConcurrency(initial_limit=4, retry_backoff=0)
+    attempts = []
+
+    async def flaky(x: int) -> int:
+        attempts.append(x)
+        if len(attempts) == 1:
+            raise RateLimitError()
+        return x
+
+    assert anyio.run(map_async_adaptive, [1], flaky, concurrency) == [1]
+    assert len(attempts) == 2
+    assert concurrency.overloaded == 1
+    assert concurrency.limit == 2
+
+
+def test_other_errors_are_not_retried():
+    concurrency = AdaptiveConcurrency(retry_backoff=0)
+    attempts = []
+
+    async def broken(x: int) -> int:
+        attempts.append(x)
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        anyio.run(concurrency.run, broken, 1)
+    assert attempts == [1]
+    assert concurrency.failed == 1
+
+
+def test_retries_give_up_after_max_retries():
+    concurrency = AdaptiveConcurrency(max_retries=0)
+
+    async def overloaded(x: int) -> int:
+        raise TimeoutError()
+
+    with pytest.raises(TimeoutError):
+        anyio.run(concurrency.run, overloaded, 1)
+    assert concurrency.overloaded == 1
+
+
+def test_is_overload_error():
+    assert is_overload_error(TimeoutError())
+    assert is_overload_error(RateLimitError())
+    assert not is_overload_error(ValueError())
@@ -0,0 +1,27 @@
+import sys
+
+import pandas as pd
+
+from ice.contrib.ought_shared.eval.output_formats import as_list
+from ice.contrib.ought_shared.eval.output_formats import read_results
+from ice.contrib.ought_shared.eval.output_formats import write_results
+
+
+def test_as_list_parses_list_reprs():
+    assert as_list("['a', 'b']") == ["a", "b"]
+    assert as_list(["a"]) == ["a"]
+
+
+def test_as_list_keeps_strings_that_are_not_lists():
+    assert as_list("[1] Smith et al.") == "[1] Smith et al."
+    assert as_list("[unclosed") == "[unclosed"
+    assert as_list("[1][0]") == "[1][0]"
+
+
+def test_csv_does_not_need_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+    df = pd.DataFrame({"answer": ["yes", "no"]})
+    path = write_results(df, tmp_path / "results", "csv", index=False)
+    assert path.name == "results.csv"
+    assert read_results(path)["answer"].tolist() == ["yes", "no"]
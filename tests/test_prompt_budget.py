@@ -0,0 +1,62 @@
+from ice.contrib.ought_shared.paragraph_synthesis import tokenizer_registry
+from ice.contrib.ought_shared.paragraph_synthesis.prompt_budget import PromptBudget
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    get_tokenizer,
+)
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    register_tokenizer,
+)
+from ice.contrib.ought_shared.paragraph_synthesis.tokenizer_registry import (
+    use_tokenizer,
+)
+
+
+class CharTokenizer:
+    def tokenize(self, text: str) -> list[str]:
+        return list(text)
+
+
+class WordTokenizer:
+    def tokenize(self, text: str) -> list[str]:
+        return text.split()
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().tokenize(text))
+
+
+def test_head_memo_follows_tokenizer_switches():
+    register_tokenizer("test-chars", CharTokenizer)
+    register_tokenizer("test-words", WordTokenizer)
+    previous = tokenizer_registry._tokenizer_name
+    budget = PromptBudget(
+        prefix="a b c",
+        shots=["d e f"],
+        sep=" | ",
+        max_tokens=1000,
+        min_completion_tokens=1,
+        count_tokens=count_tokens,
+        memo_key=get_tokenizer,
+    )
+    try:
+        use_tokenizer("test-chars")
+        assert budget.head_tokens(1) == len("a b c | d e f | ")
+        use_tokenizer("test-words")
+        assert budget.head_tokens(1) == 8
+    finally:
+        use_tokenizer(previous)
+
+
+def test_fit_drops_shots_that_do_not_fit():
+    budget = PromptBudget(
+        prefix="p",
+        shots=["s1", "s2"],
+        sep="|",
+        max_tokens=8,
+        min_completion_tokens=2,
+        count_tokens=len,
+        exact_margin=0,
+    )
+    prompt, completion_tokens = budget.fit("q")
+    assert prompt == "p|s1|q"
+    assert completion_tokens == 2
@@ -0,0 +1,57 @@
+import pyarrow as pa
+import pytest
+
+from ice.contrib.ought_shared.qa.qa_result import ElicitQAResult
+from ice.contrib.ought_shared.qa.qa_result import QAResult
+from ice.contrib.ought_shared.qa.qa_result_table import QAResultTable
+from ice.contrib.ought_shared.qa.qa_result_table import arrow_schema
+
+
+def result(answer) -> QAResult:
+    return QAResult(
+        question_short_name="population",
+        document_id="paper.pdf",
+        answer=answer,
+        experiment="baseline",
+        excerpts=["a", "b"],
+        recipe="test",
+        time="",
+        title="Paper",
+    )
+
+
+def test_schema_types():
+    schema = arrow_schema(QAResult)
+    assert schema.field("excerpts").type == pa.list_(pa.string())
+    assert schema.field("title").type == pa.string()
+    assert pa.types.is_dictionary(schema.field("recipe").type)
+    assert schema.field("answer").nullable
+    assert not schema.field("title").nullable
+
+
+def test_extend_with_nothing_is_a_no_op():
+    table = QAResultTable()
+    table.extend([])
+    assert len(table) == 0
+
+
+def test_round_trip_through_parquet(tmp_path):
+    table = QAResultTable()
+    table.extend([result("adults"), result(None)])
+    path = tmp_path / "results.parquet"
+    table.write_parquet(path)
+    read_back = QAResultTable.read_parquet(path)
+    assert [row.answer for row in read_back] == ["adults", None]
+    assert list(read_back.row(0).excerpts) == ["a", "b"]
+
+
+def test_missing_fields_take_the_model_default_or_fail():
+    table = QAResultTable(ElicitQAResult)
+    row = {**dict(result("adults")), "elicit_commit": "abc123"}
+    del row["recipe"]
+    table.append([row])
+    assert table.row(0).recipe == "Elicit QA"
+    assert isinstance(table.row(0), ElicitQAResult)
+    del row["elicit_commit"]
+    with pytest.raises(ValueError, match="elicit_commit"):
+        table.append([row])
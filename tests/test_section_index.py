@@ -0,0 +1,26 @@
+from ice.contrib.ought_shared.qa.section_index import SectionIndex
+from ice.paper import Paper
+
+
+def paragraph(text: str, section_type: str, title: str) -> dict:
+    return {
+        "sentences": [text],
+        "sections": [{"title": title}],
+        "sectionType": section_type,
+    }
+
+
+def test_back_matter_is_in_no_source():
+    paper = Paper.parse_obj(
+        {
+            "paragraphs": [
+                paragraph("We study X.", "abstract", "Abstract"),
+                paragraph("X was measured.", "main", "Methods"),
+                paragraph("[1] Smith et al.", "back", "References"),
+            ]
+        }
+    )
+    index = SectionIndex(paper)
+    assert [p.text for p in index.select(["abstract"])] == ["We study X."]
+    assert [p.text for p in index.select(["body"])] == ["X was measured."]
+    assert [p.index for p in index.select(["abstract", "body"])] == [0, 1]
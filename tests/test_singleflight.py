@@ -0,0 +1,82 @@
+import anyio
+import pytest
+
+from ice.contrib.ought_shared.singleflight import SingleFlight
+
+
+class Aborted(BaseException):
+    pass
+
+
+async def run_together(flight: SingleFlight, fn, n: int = 3) -> list:
+    results: list = [None] * n
+
+    async def call(i: int):
+        try:
+            results[i] = await flight.do("key", fn)
+        except BaseException as e:
+            results[i] = e
+
+    async with anyio.create_task_group() as tg:
+        for i in range(n):
+            tg.start_soon(call, i)
+    return results
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await anyio.sleep(0.01)
+        return "done"
+
+    assert anyio.run(run_together, flight, fn) == ["done"] * 3
+    assert len(runs) == 1
+    assert flight.stats() == {"calls": 1, "coalesced": 2}
+    assert len(flight) == 0
+
+
+@pytest.mark.parametrize("error_class", [ValueError, Aborted])
+def test_waiters_get_the_leaders_error(error_class):
+    flight = SingleFlight()
+    error = error_class("boom")
+
+    async def fn():
+        await anyio.sleep(0.01)
+        raise error
+
+    assert anyio.run(run_together, flight, fn) == [error] * 3
+
+
+def test_a_waiter_takes_over_when_the_leader_is_cancelled():
+    flight = SingleFlight()
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await anyio.sleep(0.05)
+        return len(runs)
+
+    async def main():
+        results = []
+        leader_scope = anyio.CancelScope()
+
+        async def leader():
+            with leader_scope:
+                await flight.do("key", fn)
+
+        async def waiter():
+            results.append(await flight.do("key", fn))
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(leader)
+            await anyio.sleep(0.01)
+            tg.start_soon(waiter)
+            await anyio.sleep(0.01)
+            leader_scope.cancel()
+        return results
+
+    assert anyio.run(main) == [2]
+    assert len(runs) == 2
@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from ice.contrib.ought_shared.benchmarks.yaml_modes import V2_FLOWS
+from ice.contrib.ought_shared.consort_flow.parse_experiments_arms_gs import experiments_gs
+from ice.contrib.ought_shared.utils import MyYAML
+
+EXPERIMENTS_YAML = Path(experiments_gs.__file__).with_name("experiments.yaml")
+
+
+def plain(data):
+    # Round-trip mode returns CommentedMap/CommentedSeq
+    return json.loads(json.dumps(data))
+
+
+def test_fast_mode_loads_like_round_trip():
+    round_trip = MyYAML()
+    fast = MyYAML(fast=True)
+    documents = list(pd.read_csv(V2_FLOWS)["answer"].dropna())
+    papers = list(experiments_gs.iter_paper_blocks(EXPERIMENTS_YAML))
+    assert papers
+    documents += [raw_yaml for _, raw_yaml in papers]
+    for document in documents:
+        assert fast.load(document) == plain(round_trip.load(document))
+
+
+def test_dump_loads_back_in_fast_mode():
+    round_trip = MyYAML()
+    fast = MyYAML(fast=True)
+    for answer in pd.read_csv(V2_FLOWS)["answer"].dropna():
+        data = fast.load(answer)
+        assert fast.load(round_trip.dump(data)) == data
@@ -11,6 +11,28 @@ def reorder_columns(df: pd.DataFrame, ordered_columns: list[str]) -> pd.DataFram
 
 # from https://yaml.readthedocs.io/en/latest/example.html
 class MyYAML(YAML):
+    """
+    With fast=True, load goes through libyaml (ruamel's C safe loader) and
+    returns plain dicts and lists. dump always uses the round-trip emitter:
+    libyaml folds long lines differently, so its output wouldn't match.
+    """
+
+    def __init__(self, *args, fast: bool = False, **kw):
+        super().__init__(*args, **kw)
+        self.fast = fast
+        self._fast_yaml = None
+
+    @property
+    def fast_yaml(self) -> YAML:
+        if self._fast_yaml is None:
+            self._fast_yaml = YAML(typ="safe", pure=False)
+        return self._fast_yaml
+
+    def load(self, stream):
+        if self.fast:
+            return self.fast_yaml.load(stream)
+        return YAML.load(self, stream)
+
     def dump(self, data, stream=None, **kw):
         inefficient = False
         if stream is None: